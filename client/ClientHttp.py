@@ -1,54 +1,93 @@
-import json
+import os
+import sys
 import socket
-import ssl
-import argparse
 from CharacterUtils import CharacterUtils
 from HttpHelper import HttpHelper
 from HTTPRequest import HTTPRequest 
 from HTTPResponse import HTTPResponse 
 
+# Ruta del socket Unix de un demonio ya arrancado con --daemon; si responde, se le delega la peticion
+daemon_socket_variable = "HTTP_CLIENT_DAEMON"
+default_daemon_socket = "/tmp/http-client.sock"
+
 class HTTPClient :
-    def __init__(self, url, use_https=False):
+    # Contextos TLS por fichero de CA (None: los certificados del sistema)
+    ssl_contexts = {}
+
+    def __init__(self, url, use_https=False, pool=None, cafile=None):
         host, port, path = HttpHelper.parse_url(url)
         self.host = host
         self.port = port
         self.url = url
         self.path = path
         self.use_https = use_https
+        self.pool = pool
+        self.cafile = cafile
+        # Una conexion verificada con otra CA no debe reutilizarse para esta peticion
+        self.pool_key = (host, port, use_https, cafile)
     
     def send_request(self, method: str, header: str, data: str):
-        req_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        
-        if self.use_https:
-                context = ssl.create_default_context()
-                req_socket = context.wrap_socket(req_socket, server_hostname=self.host)
-                self.port = 443
-                
-        req_socket.connect((self.host, self.port))        
-        request = HTTPRequest.build_http_request(method=method, uri=self.path,  headers=header, body=data)
-        req_socket.send(request.encode())
-        response = self.receive_response(req_socket)
-        req_socket.close()
+        request = HTTPRequest.build_http_request(method=method, uri=self.path,  headers=header, body=data).encode()
+        while True:
+            connection = self.pool.acquire(self.pool_key) if self.pool else None
+            reused = connection is not None
+            req_socket, reader = connection if reused else self.connect()
+            try:
+                req_socket.sendall(request)
+                response, reusable = self.receive_response(reader, method)
+                break
+            except (OSError, ValueError):
+                reader.close()
+                req_socket.close()
+                # Una conexion del pool pudo haber sido cerrada por el servidor: se reintenta con una nueva
+                if not reused:
+                    raise
+
+        if self.pool and reusable:
+            self.pool.release(self.pool_key, req_socket, reader)
+        else:
+            reader.close()
+            req_socket.close()
         return response
+
+    def connect(self):
+        req_socket = socket.create_connection((self.host, self.port))
+        if self.use_https:
+            # Solo las peticiones https pagan la importacion de ssl y la carga de certificados
+            context = HTTPClient.ssl_contexts.get(self.cafile)
+            if context is None:
+                import ssl
+                context = HTTPClient.ssl_contexts[self.cafile] = ssl.create_default_context(cafile=self.cafile)
+            req_socket = context.wrap_socket(req_socket, server_hostname=self.host)
+        return req_socket, req_socket.makefile('rb')
         
-        
-    def receive_response(self, req_socket: socket.socket):
-        head = ""
+    def receive_response(self, reader, method: str):
+        """Reads one response; returns it with whether the connection can be reused."""
+        head = b""
         while True:
-            data = req_socket.recv(1)
-            if not data:
-                break
-            head += data.decode()
-            if head.endswith(CharacterUtils.crlf * 2):
+            line = reader.readline()
+            head += line
+            if not line or line == CharacterUtils.crlf.encode():
                 break
-        header_contents = HTTPResponse.parse_response_head(head)
-        
-        if "Transfer-Encoding" in header_contents["headers_fields"] and header_contents["headers_fields"]["Transfer-Encoding"] == "chunked":
-                body = self.chunked_body(req_socket)
-                
-        elif "Content-Length" in header_contents["headers_fields"]:
-            body = req_socket.recv(int(header_contents["headers_fields"]["Content-Length"])).decode()
-            
+        if not head:
+            raise ConnectionError("Connection closed before the response head")
+        header_contents = HTTPResponse.parse_response_head(head.decode())
+        fields = header_contents["headers_fields"]
+        status = header_contents['status_code']
+
+        reusable = fields.get("Connection", "").lower() != "close"
+        if header_contents['http_version'] == "HTTP/1.0" and fields.get("Connection", "").lower() != "keep-alive":
+            reusable = False
+
+        if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+            body = ""
+        elif "Transfer-Encoding" in fields and fields["Transfer-Encoding"] == "chunked":
+            body = self.chunked_body(reader)
+        elif "Content-Length" in fields:
+            body = self.read_exactly(reader, int(fields["Content-Length"])).decode()
+        else:
+            body = reader.read().decode()
+            reusable = False
             
         status_line = (
         f"{header_contents['http_version']} "
@@ -62,22 +101,20 @@ class HTTPClient :
             "reason":header_contents['reason_phrase'],
             "headers": header_contents["headers_fields"],
             "body": body
-        }
+        }, reusable
 
+    def read_exactly(self, reader, size: int):
+        data = reader.read(size)
+        if len(data) < size:
+            raise ConnectionError("Unexpected EOF")
+        return data
 
-    def chunked_body(self, req_socket: socket.socket):
+    def chunked_body(self, reader):
         body = b''
         while True:
-            
-            chunk_size_line = b''
-            while True:
-                byte = req_socket.recv(1)
-                if not byte:
-                    raise ConnectionError("Unexpected EOF")
-                chunk_size_line += byte
-                if chunk_size_line.endswith(CharacterUtils.crlf.encode()):
-                    break
-
+            chunk_size_line = reader.readline()
+            if not chunk_size_line:
+                raise ConnectionError("Unexpected EOF")
             
             chunk_size_str = chunk_size_line.strip().split(b';', 1)[0]
             chunk_size = int(chunk_size_str, 16)
@@ -85,30 +122,21 @@ class HTTPClient :
             if chunk_size == 0:
                 break
 
-            chunk_data = b''
-            while len(chunk_data) < chunk_size:
-                remaining = chunk_size - len(chunk_data)
-                chunk_data += req_socket.recv(remaining)
+            body += self.read_exactly(reader, chunk_size)
+            # CRLF que cierra cada trozo
+            self.read_exactly(reader, 2)
 
-            body += chunk_data
-
-            crlf = b''
-            while len(crlf) < 2:
-                crlf += req_socket.recv(1)
-
-        trailers = b''
         while True:
-            byte = req_socket.recv(1)
-            if not byte:
-                break
-            trailers += byte
-            if trailers.endswith(CharacterUtils.crlf * 2):
+            trailer = reader.readline()
+            if not trailer or trailer == CharacterUtils.crlf.encode():
                 break
 
         return body.decode()
 
-def parse():
+def parse(argv=None):
     """Parses command-line arguments for making an HTTP request."""
+    import argparse
+
     parser = argparse.ArgumentParser(description="Send an HTTP request.")
     
     parser.add_argument(
@@ -116,8 +144,8 @@ def parse():
         help="HTTP method of the request (e.g., GET, POST, PUT, DELETE)"
     )
     parser.add_argument(
-        "-u", "--url", type=str, required=True,
-        help="Target resource URL"
+        "-u", "--url", type=str, required=True, action="append",
+        help="Target resource URL; repeat it to send several requests (multiplexed on one connection with --http2)"
     )
     parser.add_argument(
         "-H", "--headers", type=str, default="{}",
@@ -127,8 +155,16 @@ def parse():
         "-d", "--data", type=str, default="",
         help="Body of the request (useful for POST/PUT requests)"
     )
+    parser.add_argument(
+        "--http2", action="store_true",
+        help="Use HTTP/2 (prior knowledge for http://, ALPN for https://)"
+    )
+    parser.add_argument(
+        "--cafile", type=str,
+        help="PEM file with the CA certificates to trust for https:// instead of the system ones (e.g., server/cert.pem)"
+    )
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
 
     return {
@@ -136,15 +172,131 @@ def parse():
         "url": args.url,
         "headers": args.headers,
         "data": args.data,
+        "http2": args.http2,
+        "cafile": args.cafile,
     }
     
     
-def main():
-    args = parse()
+def send_http2(args):
+    """Sends one request per URL over a single multiplexed HTTP/2 connection."""
+    from Http2Client import HTTP2Client
+
+    origin = HttpHelper.parse_url(args["url"][0])[:2]
+    if any(HttpHelper.parse_url(url)[:2] != origin for url in args["url"]):
+        raise ValueError("All URLs must share host and port to be multiplexed over HTTP/2")
+    client = HTTP2Client(args["url"][0], use_https=args["url"][0].startswith("https://"), cafile=args["cafile"])
+    try:
+        requests = [(args["method"], HttpHelper.parse_url(url)[2], args["headers"], args["data"]) for url in args["url"]]
+        return client.send_requests(requests)
+    finally:
+        client.close()
+
+
+def run(argv=None, pool=None):
+    """Parses argv, sends the requests and prints the JSON output."""
+    import json
+
+    args = parse(argv)
     
-    client = HTTPClient(args["url"])
-    response = client.send_request(method=args["method"], header=args["headers"], data=args["data"])
-    print(json.dumps(response, indent=4))
+    if args["http2"]:
+        responses = send_http2(args)
+    else:
+        responses = []
+        for url in args["url"]:
+            client = HTTPClient(url, use_https=url.startswith("https://"), pool=pool, cafile=args["cafile"])
+            responses.append(client.send_request(method=args["method"], header=args["headers"], data=args["data"]))
+    print(json.dumps(responses[0] if len(responses) == 1 else responses, indent=4))
+
+
+def serve_daemon(path: str):
+    """Runs invocations forwarded over a Unix socket in this warm process, reusing pooled connections."""
+    from ConnectionPool import ConnectionPool
+
+    pool = ConnectionPool()
+    if os.path.exists(path):
+        os.unlink(path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen(16)
+    print(f"Client daemon listening on {path}")
+    try:
+        # Una invocacion a la vez: stdout y stderr se redirigen para todo el proceso
+        while True:
+            conn, _ = listener.accept()
+            with conn:
+                handle_daemon_call(conn, pool)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.close()
+        os.unlink(path)
+
+
+def handle_daemon_call(conn: socket.socket, pool):
+    import io
+    import contextlib
+    import traceback
+
+    request = b""
+    while True:
+        data = conn.recv(65536)
+        if not data:
+            break
+        request += data
+    cwd, *argv = request.decode().split("\0")
+
+    stdout, stderr = io.StringIO(), io.StringIO()
+    code = 0
+    try:
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            # Las rutas relativas (p. ej. --cafile) se resuelven como en el proceso que invoca
+            os.chdir(cwd)
+            run(argv, pool)
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else 1
+    except Exception:
+        code = 1
+        stderr.write(traceback.format_exc())
+    try:
+        conn.sendall(f"{code}\n".encode() + stdout.getvalue().encode() + b"\0" + stderr.getvalue().encode())
+    except OSError:
+        pass
+
+
+def call_daemon(path: str, argv):
+    """Forwards argv to a running daemon; returns False when there is none so the caller runs locally."""
+    daemon = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        daemon.connect(path)
+    except OSError:
+        daemon.close()
+        return False
+    with daemon:
+        daemon.sendall("\0".join([os.getcwd()] + argv).encode())
+        daemon.shutdown(socket.SHUT_WR)
+        reply = b""
+        while True:
+            data = daemon.recv(65536)
+            if not data:
+                break
+            reply += data
+    code, _, output = reply.partition(b"\n")
+    stdout, _, stderr = output.partition(b"\0")
+    sys.stdout.write(stdout.decode())
+    sys.stderr.write(stderr.decode())
+    if int(code or 1):
+        sys.exit(int(code or 1))
+    return True
+
+
+def main():
+    if sys.argv[1:2] == ["--daemon"]:
+        serve_daemon(sys.argv[2] if len(sys.argv) > 2 else default_daemon_socket)
+        return
+    daemon_path = os.environ.get(daemon_socket_variable)
+    if daemon_path and call_daemon(daemon_path, sys.argv[1:]):
+        return
+    run()
     
 if __name__=="__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,37 @@
+import time
+from threading import Lock
+
+
+class ConnectionPool:
+    """Keep-alive connections kept open between requests, per (host, port, https, trusted CA file)."""
+
+    def __init__(self, max_idle_per_host=4, idle_timeout=4):
+        # Por debajo del Keep-Alive timeout del servidor (5s) para no reutilizar conexiones ya cerradas
+        self.max_idle_per_host = max_idle_per_host
+        self.idle_timeout = idle_timeout
+        # (socket, reader, instante en que quedo libre)
+        self.idle = {}
+        self.lock = Lock()
+
+    def acquire(self, key):
+        """Returns (socket, reader) of the most recently released live connection, or None."""
+        with self.lock:
+            connections = self.idle.get(key)
+            while connections:
+                req_socket, reader, since = connections.pop()
+                if time.monotonic() - since < self.idle_timeout:
+                    return req_socket, reader
+                self.close(req_socket, reader)
+        return None
+
+    def release(self, key, req_socket, reader):
+        with self.lock:
+            connections = self.idle.setdefault(key, [])
+            if len(connections) < self.max_idle_per_host:
+                connections.append((req_socket, reader, time.monotonic()))
+                return
+        self.close(req_socket, reader)
+
+    def close(self, req_socket, reader):
+        reader.close()
+        req_socket.close()
@@ -1,6 +1,5 @@
 from CharacterUtils import CharacterUtils
 from HttpHelper import HttpHelper 
-import json
 
 
 class HTTPRequest:
@@ -19,8 +18,9 @@ class HTTPRequest:
     
     def format_headers(headers_json: str) -> str:
         """Formats HTTP headers from a JSON string representation."""
-        if not headers_json:
+        if not headers_json or headers_json == "{}":
             return ""
+        import json
         headers_dict = json.loads(headers_json)
         headers = ""
         for key, value in headers_dict.items():
@@ -32,4 +32,9 @@ class HTTPRequest:
         """Builds the complete HTTP request by assembling the request line, headers, and body."""
         request_line = HTTPRequest.create_request_line(method, uri, HttpHelper.format_http_version(1, 1))
         headers_section = HTTPRequest.format_headers(headers)
-        return request_line + headers_section + CharacterUtils.crlf + (body if body else "")
+        body = body if body else ""
+        # Sin Content-Length el servidor no lee el cuerpo y lo tomaria como el inicio de la siguiente peticion
+        header_names = [line.split(":", 1)[0].strip().lower() for line in headers_section.split(CharacterUtils.crlf)]
+        if body and "content-length" not in header_names and "transfer-encoding" not in header_names:
+            headers_section += "Content-Length: " + str(len(body.encode("utf-8"))) + CharacterUtils.crlf
+        return request_line + headers_section + CharacterUtils.crlf + body
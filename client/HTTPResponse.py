@@ -1,5 +1,4 @@
 from CharacterUtils import CharacterUtils
-import re
 
 
 class HTTPResponse:
@@ -13,8 +12,8 @@ class HTTPResponse:
         for header in headers_list:
             if not header:
                 continue
-            key, value = re.split(r":\s+", header, 1)
-            header_fields[key] = value
+            key, _, value = header.partition(":")
+            header_fields[key] = value.lstrip(CharacterUtils.space + CharacterUtils.horizontal_tab)
 
         http_version, status_code, reason_phrase = status_line.split(CharacterUtils.space, 2)
 
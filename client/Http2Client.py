@@ -0,0 +1,118 @@
+import json
+import os
+import socket
+import sys
+from collections import deque
+from http import HTTPStatus
+from HttpHelper import HttpHelper
+
+# El codec HPACK y el manejo de frames se comparten con el servidor
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+from http2 import (H2Connection, H2Stream, connection_preface, connection_specific_headers, default_window_size,
+                   settings_enable_push, settings_initial_window_size, settings_max_concurrent_streams)
+
+
+class HTTP2Client(H2Connection):
+    """HTTP/2 client that multiplexes requests over one connection (h2c prior knowledge, or ALPN h2 over TLS)."""
+
+    def __init__(self, url, use_https=False, cafile=None):
+        host, port, path = HttpHelper.parse_url(url)
+        self.host = host
+        self.port = port
+        self.url = url
+        self.path = path
+        self.use_https = use_https
+
+        req_socket = socket.create_connection((self.host, self.port))
+        if self.use_https:
+            import ssl
+            context = ssl.create_default_context(cafile=cafile)
+            context.set_alpn_protocols(['h2'])
+            req_socket = context.wrap_socket(req_socket, server_hostname=self.host)
+            if req_socket.selected_alpn_protocol() != 'h2':
+                req_socket.close()
+                raise ConnectionError(f"{self.host} did not negotiate HTTP/2")
+
+        super().__init__(req_socket, local_settings={
+            settings_enable_push: 0,
+            settings_initial_window_size: default_window_size,
+        })
+        self.next_stream_id = 1
+        self.completed = {}
+        self.sock.sendall(connection_preface)
+        self.send_settings()
+
+    def send_request(self, method: str, header: str, data: str):
+        return self.send_requests([(method, self.path, header, data)])[0]
+
+    def send_requests(self, requests):
+        """Sends (method, path, headers_json, body) requests concurrently and returns the responses in order."""
+        pending = deque(requests)
+        stream_ids = []
+        while pending or any(stream_id not in self.completed for stream_id in stream_ids):
+            max_streams = self.peer_settings.get(settings_max_concurrent_streams, len(requests))
+            while pending and len(self.streams) < max_streams:
+                stream_ids.append(self.start_request(*pending.popleft()))
+            self.handle_frame(*self.read_frame())
+
+        responses = []
+        for stream_id in stream_ids:
+            response = self.completed.pop(stream_id)
+            if response is None:
+                raise ConnectionError(f"Stream {stream_id} was reset by the server")
+            responses.append(response)
+        return responses
+
+    def start_request(self, method, path, header, data):
+        stream_id = self.next_stream_id
+        self.next_stream_id += 2
+        stream = H2Stream(stream_id, self.peer_settings[settings_initial_window_size])
+        self.streams[stream_id] = stream
+
+        authority = self.host if self.port in (80, 443) else f"{self.host}:{self.port}"
+        headers = [
+            (':method', method),
+            (':scheme', 'https' if self.use_https else 'http'),
+            (':authority', authority),
+            (':path', path),
+        ]
+        for key, value in json.loads(header or '{}').items():
+            if key.lower() not in connection_specific_headers and key.lower() != 'host':
+                headers.append((key.lower(), value))
+        body = data.encode('utf-8') if data else b''
+        if body:
+            headers.append(('content-length', str(len(body))))
+
+        self.send_headers(stream_id, headers, end_stream=not body)
+        if body:
+            self.send_data(stream, body)
+        return stream_id
+
+    def wait_for_window(self):
+        # Un solo hilo: mientras falta ventana se siguen procesando los frames entrantes
+        self.handle_frame(*self.read_frame())
+
+    def stream_ended(self, stream):
+        self.streams.pop(stream.stream_id, None)
+        pseudo = {name: value for name, value in stream.headers if name.startswith(':')}
+        status = int(pseudo.get(':status', 0))
+        try:
+            reason = HTTPStatus(status).phrase
+        except ValueError:
+            reason = ''
+        self.completed[stream.stream_id] = {
+            "status_line": f"HTTP/2 {status} {reason}",
+            "http_version": "HTTP/2",
+            "status": status,
+            "reason": reason,
+            "headers": {name: value for name, value in stream.headers if not name.startswith(':')},
+            "body": stream.data.decode('utf-8'),
+        }
+
+    def stream_reset(self, stream):
+        self.streams.pop(stream.stream_id, None)
+        self.completed[stream.stream_id] = None
+
+    def close(self):
+        self.send_goaway(0)
+        self.sock.close()
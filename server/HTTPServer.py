@@ -1,44 +1,242 @@
+import os
+import sys
 import socket
-from threading import Thread
+import ssl
+import time
+import math
+import select
+import signal
+import argparse
+import subprocess
+from threading import Thread, Lock, Event
 import json
 import xml.etree.ElementTree as ET
 import token
+from proxy import ReverseProxy, ProxyError
+from auth import TokenAuth, hash_token
+from ratelimit import RateLimiter
+from http2 import H2ServerConnection, connection_preface, preface_tail
 
 carriage_return = '\r'
 line_feed = '\n'
 crlf = carriage_return+line_feed
+max_line_length = 8192
+max_head_length = 65536
+accept_poll_interval = 0.5
+# Variables de entorno con las que un proceso recargado recibe el socket de escucha
+listen_fd_variable = 'HTTP_SERVER_LISTEN_FD'
+ready_fd_variable = 'HTTP_SERVER_READY_FD'
 
 class HTTPServer:
-    def __init__(self, host='127.0.0.1', port=8080):
+    def __init__(self, host='127.0.0.1', port=8080, header_timeout=10, body_timeout=10,
+                 keep_alive_timeout=5, max_requests=100, max_connections=100,
+                 certfile=None, keyfile=None, proxy=None, auth=None, ip_limiter=None, token_limiter=None,
+                 rate_limit_status_path='/secure/rate-limits', drain_timeout=30, reload_timeout=10,
+                 listen_fd=None):
         self.host = host
         self.port = port
-        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.server_socket.bind((self.host, self.port))
-        self.server_socket.listen(5)
-        print(f"Server is listening on {self.host}:{self.port}")
+        self.header_timeout = header_timeout
+        self.body_timeout = body_timeout
+        self.keep_alive_timeout = keep_alive_timeout
+        self.max_requests = max_requests
+        self.max_connections = max_connections
+        self.proxy = proxy
+        self.auth = auth if auth is not None else TokenAuth(tokens=[token.TOKEN])
+        self.ip_limiter = ip_limiter
+        self.token_limiter = token_limiter
+        self.rate_limit_status_path = rate_limit_status_path
+        self.drain_timeout = drain_timeout
+        self.reload_timeout = reload_timeout
+        self.stopping = Event()
+        self.draining = False
+        # socket -> instante en que quedo inactiva (None mientras atiende una peticion)
+        self.connections = {}
+        self.connections_lock = Lock()
+        self.http2_sessions = set()
+        self.ssl_context = self.create_ssl_context(certfile, keyfile) if certfile else None
+        self.tls_metrics = {'handshakes': 0, 'resumed': 0, 'failed': 0, 'handshake_time': 0.0}
+        self.tls_metrics_lock = Lock()
+        if listen_fd is not None:
+            # Socket heredado del proceso anterior durante una recarga
+            self.server_socket = socket.socket(fileno=listen_fd)
+            self.host, self.port = self.server_socket.getsockname()[:2]
+        else:
+            self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.server_socket.bind((self.host, self.port))
+            self.server_socket.listen(5)
+        scheme = 'https' if self.ssl_context else 'http'
+        print(f"Server is listening on {scheme}://{self.host}:{self.port}")
+
+    def create_ssl_context(self, certfile, keyfile):
+        """Creates the server TLS context; session tickets stay enabled so clients can resume."""
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.minimum_version = ssl.TLSVersion.TLSv1_2
+        context.load_cert_chain(certfile, keyfile)
+        context.options &= ~ssl.OP_NO_TICKET
+        context.num_tickets = 2
+        context.set_alpn_protocols(['h2', 'http/1.1'])
+        return context
 
     def start(self):
-        while True:
-            client_socket, client_address = self.server_socket.accept()
+        self.server_socket.settimeout(accept_poll_interval)
+        while not self.stopping.is_set():
+            try:
+                client_socket, client_address = self.server_socket.accept()
+            except socket.timeout:
+                continue
             print(f"Accepted connection from {client_address}")
-            client_handler = Thread(target=self.handle_client, args=(client_socket,))
+            # Admision barata: solo se comprueba que la IP tenga fichas, se consumen por peticion
+            retry_after = self.ip_limiter.acquire(client_address[0], consume=False) if self.ip_limiter else 0
+            if retry_after:
+                self.reject_connection(client_socket, 429, 'Too Many Requests', [f"Retry-After: {math.ceil(retry_after)}"])
+                continue
+            if not self.register_connection(client_socket):
+                self.reject_connection(client_socket)
+                continue
+            client_handler = Thread(target=self.handle_client, args=(client_socket, client_address))
             client_handler.start()
+        self.server_socket.close()
+        self.drain()
+
+    def install_signal_handlers(self):
+        """SIGTERM/SIGINT drain and exit; SIGHUP hands the listening socket to a new process first."""
+        signal.signal(signal.SIGTERM, lambda signum, frame: self.shutdown())
+        signal.signal(signal.SIGINT, lambda signum, frame: self.shutdown())
+        if hasattr(signal, 'SIGHUP'):
+            signal.signal(signal.SIGHUP, lambda signum, frame: self.reload())
 
-    def handle_client(self, client_socket):
+    def shutdown(self):
+        """Stops accepting; start() then drains the open connections and returns."""
+        print("Shutting down: no longer accepting connections")
+        self.stopping.set()
+
+    def reload(self):
+        """Starts a new server process on the same listening socket and drains this one once it is ready."""
+        listen_fd = self.server_socket.fileno()
         try:
-            client_socket.settimeout(10)
-            while True:
-                request_data = b""
-                while True:
-                    chunk = client_socket.recv(1)
-                    if not chunk:
-                        break
-                    request_data += chunk
-                    if crlf + crlf in request_data.decode('utf-8'):
-                        break  # Fin de los encabezados
+            ready_read, ready_write = os.pipe()
+        except OSError as e:
+            # Se ejecuta dentro del manejador de SIGHUP: un fallo aqui no debe tumbar el bucle de accept
+            print(f"Reload failed: {e}")
+            return
+        env = dict(os.environ)
+        env[listen_fd_variable] = str(listen_fd)
+        env[ready_fd_variable] = str(ready_write)
+        try:
+            process = subprocess.Popen([sys.executable] + sys.argv, env=env, pass_fds=(listen_fd, ready_write))
+        except (OSError, ValueError) as e:
+            print(f"Reload failed: cannot start a new process: {e}")
+            os.close(ready_read)
+            return
+        finally:
+            os.close(ready_write)
+        try:
+            ready, _, _ = select.select([ready_read], [], [], self.reload_timeout)
+            started = bool(ready) and os.read(ready_read, 1) == b'1'
+        finally:
+            os.close(ready_read)
+        if not started:
+            # Si el nuevo proceso no arranca se sigue sirviendo con este
+            print(f"Reload failed: process {process.pid} did not become ready")
+            if process.poll() is None:
+                process.kill()
+            return
+        print(f"Reloaded: process {process.pid} is accepting connections")
+        self.shutdown()
+
+    def notify_ready(self, ready_fd):
+        os.write(ready_fd, b'1')
+        os.close(ready_fd)
+
+    def drain(self):
+        """Lets in-flight requests finish, closing idle connections, until drain_timeout forces the rest."""
+        self.draining = True
+        deadline = time.monotonic() + self.drain_timeout
+        with self.connections_lock:
+            sessions = list(self.http2_sessions)
+        for session in sessions:
+            session.drain()
+        while True:
+            with self.connections_lock:
+                if not self.connections:
+                    break
+                idle = [sock for sock, since in self.connections.items() if since is not None]
+                remaining = list(self.connections)
+            if time.monotonic() >= deadline:
+                print(f"Drain timeout reached, closing {len(remaining)} connections")
+                for client_socket in remaining:
+                    self.close_idle_connection(client_socket)
+                break
+            for client_socket in idle:
+                self.close_idle_connection(client_socket)
+            time.sleep(0.1)
+        print("Server stopped")
+
+    def register_connection(self, client_socket):
+        """Registers a new connection, evicting the oldest idle ones when over max_connections."""
+        with self.connections_lock:
+            while len(self.connections) >= self.max_connections:
+                idle = [(since, sock) for sock, since in self.connections.items() if since is not None]
+                if not idle:
+                    return False
+                _, oldest = min(idle, key=lambda item: item[0])
+                del self.connections[oldest]
+                self.close_idle_connection(oldest)
+            # Ocupada hasta que envie su primera respuesta: no se desaloja a quien aun envia su peticion
+            self.connections[client_socket] = None
+        return True
+
+    def unregister_connection(self, client_socket):
+        with self.connections_lock:
+            self.connections.pop(client_socket, None)
+
+    def mark_connection(self, client_socket, idle):
+        with self.connections_lock:
+            if client_socket in self.connections:
+                self.connections[client_socket] = time.monotonic() if idle else None
+
+    def replace_connection(self, old_socket, new_socket):
+        with self.connections_lock:
+            if old_socket in self.connections:
+                self.connections[new_socket] = self.connections.pop(old_socket)
+
+    def close_idle_connection(self, client_socket):
+        # El hilo que la atiende ve EOF en su recv y termina por su cuenta.
+        # Se usa el shutdown del socket base para no tocar el estado TLS desde otro hilo
+        try:
+            socket.socket.shutdown(client_socket, socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def reject_connection(self, client_socket, status_code=503, response_body='Too many open connections', extra_headers=()):
+        if self.ssl_context:
+            client_socket.close()
+            return
+        response_headers = [
+            "Content-Type: text/plain",
+            f"Content-Length: {len(response_body)}",
+            "Connection: close",
+            *extra_headers,
+        ]
+        try:
+            client_socket.sendall(self.build_response('HTTP/1.1', status_code, response_headers, response_body).encode('utf-8'))
+        except OSError:
+            pass
+        finally:
+            client_socket.close()
+
+    def handle_client(self, client_socket, client_address):
+        try:
+            if self.ssl_context:
+                client_socket = self.tls_handshake(client_socket)
+            reader = client_socket.makefile('rb')
+            requests_served = 0
+            while requests_served < self.max_requests:
+                request_data = self.read_request_head(client_socket, reader, requests_served)
                 if not request_data:
                     break
-                
+
                 request_data = request_data.decode('utf-8')
                 request_line = request_data.split(crlf)[0]
                 method, path, http_version = request_line.split()
@@ -50,46 +248,322 @@ class HTTPServer:
                         key, value = line.split(': ', 1)
                         headers[key] = value
 
-                body = ""
-                if "Content-Length" in headers:
-                    body = client_socket.recv(int(headers["Content-Length"])).decode()
+                if method == 'PRI' and path == '*' and http_version == 'HTTP/2.0':
+                    # HTTP/2 con conocimiento previo (o ALPN h2 sobre TLS)
+                    self.serve_http2(client_socket, reader, client_address, preface_tail)
+                    break
+
+                # Se conserva en bytes: los cuerpos binarios se reenvian tal cual a los upstreams
+                body = b""
+                transfer_encoding = next((value.strip().lower() for key, value in headers.items()
+                                          if key.lower() == 'transfer-encoding'), None)
+                route = self.proxy.match(path) if self.proxy else None
+                if transfer_encoding is not None:
+                    # Solo las rutas del proxy aceptan cuerpos chunked (se reenvian a medida que llegan).
+                    # Un cuerpo que no se lee no puede quedar en la conexion: se responde y se cierra
+                    if not route or transfer_encoding != 'chunked':
+                        status_code = 411 if transfer_encoding == 'chunked' else 501
+                        response_body = 'Length Required' if status_code == 411 else 'Transfer-Encoding not supported'
+                        response_headers = [
+                            "Content-Type: text/plain",
+                            f"Content-Length: {len(response_body)}"
+                        ]
+                        response = self.build_response(http_version, status_code, response_headers, response_body)
+                        client_socket.sendall(self.add_connection_headers(response, False, requests_served).encode('utf-8'))
+                        break
+                elif "Content-Length" in headers:
+                    body = self.read_request_body(client_socket, reader, int(headers["Content-Length"]))
+
+                if (headers.get('Upgrade', '').lower() == 'h2c' and 'HTTP2-Settings' in headers and not self.ssl_context
+                        and transfer_encoding is None):
+                    client_socket.sendall(f'HTTP/1.1 101 Switching Protocols{crlf}Connection: Upgrade{crlf}Upgrade: h2c{crlf}{crlf}'.encode('utf-8'))
+                    self.serve_http2(client_socket, reader, client_address, connection_preface, (method, path, headers, body.decode()))
+                    break
 
-                connection_header = headers.get('Connection', 'close').lower()
+                requests_served += 1
+                connection_header = headers.get('Connection', '').lower()
                 keep_alive = (http_version == 'HTTP/1.1' and connection_header != 'close') or connection_header == 'keep-alive'
+                keep_alive = keep_alive and requests_served < self.max_requests and not self.draining
 
-                response = self.process_request(method, path, http_version, headers, body, request_data)
+                retry_after = self.check_rate_limit(client_address[0], headers)
+                # La autenticacion va antes del proxy: las rutas protegidas no se exponen a traves de un upstream
+                unauthorized = None if retry_after else self.check_auth(path, http_version, headers)
+                if (retry_after or unauthorized) and transfer_encoding is not None:
+                    keep_alive = False  # El cuerpo chunked queda sin leer
+                if retry_after:
+                    response = self.add_connection_headers(self.too_many_requests(http_version, retry_after), keep_alive, requests_served)
+                    client_socket.sendall(response.encode('utf-8'))
+                elif unauthorized:
+                    client_socket.sendall(self.add_connection_headers(unauthorized, keep_alive, requests_served).encode('utf-8'))
+                elif self.proxy and self.proxy.allow_connect and method == 'CONNECT':
+                    self.handle_connect(client_socket, reader, path, http_version)
+                    break
+                elif route:
+                    keep_alive = self.forward_request(route, client_socket, method, path, http_version, headers,
+                                                      body, keep_alive, requests_served,
+                                                      reader if transfer_encoding is not None else None)
+                else:
+                    response = self.process_request(method, path, http_version, headers, body.decode(), request_data)
+                    response = self.add_connection_headers(response, keep_alive, requests_served)
 
-                client_socket.sendall(response.encode('utf-8'))
+                    client_socket.sendall(response.encode('utf-8'))
 
                 if not keep_alive:
                     break
+                self.mark_connection(client_socket, idle=True)
 
         except socket.timeout:
             print("Conexión cerrada por timeout")
         except Exception as e:
             print(f"Error handling request: {e}")
         finally:
+            self.unregister_connection(client_socket)
             client_socket.close()
-    
+
+    def serve_http2(self, client_socket, reader, client_address, expected_preface, upgraded_request=None):
+        """Hands the connection to an HTTP/2 session that multiplexes streams onto process_request."""
+        client_socket.settimeout(self.keep_alive_timeout)
+        # Lo que el lector HTTP/1.1 ya tenga en buffer pertenece a la sesion HTTP/2
+        initial_data = reader.read1(65536)
+        connection = H2ServerConnection(self, client_socket, client_address, initial_data,
+                                        max_header_list_size=max_head_length)
+        with self.connections_lock:
+            self.http2_sessions.add(connection)
+        if self.draining:
+            connection.drain()
+        try:
+            connection.serve(expected_preface, upgraded_request)
+        finally:
+            with self.connections_lock:
+                self.http2_sessions.discard(connection)
+
+    def process_http2_request(self, client_address, method, path, headers, body):
+        """Answers one HTTP/2 stream with the same rate limits and handlers as HTTP/1.1."""
+        http_version = 'HTTP/2.0'
+        request_data = f'{method} {path} {http_version}{crlf}' + ''.join(f'{key}: {value}{crlf}' for key, value in headers.items()) + crlf
+        retry_after = self.check_rate_limit(client_address[0], headers)
+        if retry_after:
+            return self.too_many_requests(http_version, retry_after)
+        unauthorized = self.check_auth(path, http_version, headers)
+        if unauthorized:
+            return unauthorized
+        if self.proxy and ((self.proxy.allow_connect and method == 'CONNECT') or self.proxy.match(path)):
+            response_body = 'Proxied routes are only available over HTTP/1.1'
+            response_headers = [
+                "Content-Type: text/plain",
+                f"Content-Length: {len(response_body)}"
+            ]
+            return self.build_response(http_version, 501, response_headers, response_body)
+        return self.process_request(method, path, http_version, headers, body, request_data)
+
+    def tls_handshake(self, client_socket):
+        """Performs the TLS handshake within header_timeout and records its duration."""
+        client_socket.settimeout(self.header_timeout)
+        tls_socket = self.ssl_context.wrap_socket(client_socket, server_side=True, do_handshake_on_connect=False)
+        self.replace_connection(client_socket, tls_socket)
+        started = time.perf_counter()
+        try:
+            tls_socket.do_handshake()
+        except (ssl.SSLError, OSError):
+            with self.tls_metrics_lock:
+                self.tls_metrics['failed'] += 1
+            # El registro ya apunta al socket TLS; handle_client solo conoce el socket original
+            self.unregister_connection(tls_socket)
+            tls_socket.close()
+            raise
+        elapsed = time.perf_counter() - started
+        with self.tls_metrics_lock:
+            self.tls_metrics['handshakes'] += 1
+            self.tls_metrics['handshake_time'] += elapsed
+            if tls_socket.session_reused:
+                self.tls_metrics['resumed'] += 1
+        resumed = ' (resumed)' if tls_socket.session_reused else ''
+        print(f"TLS handshake completed in {elapsed * 1000:.2f} ms{resumed} using {tls_socket.version()}")
+        return tls_socket
+
+    def get_tls_metrics(self):
+        """Returns handshake counters plus the average handshake time in milliseconds."""
+        with self.tls_metrics_lock:
+            metrics = dict(self.tls_metrics)
+        completed = metrics['handshakes']
+        metrics['average_handshake_ms'] = metrics['handshake_time'] * 1000 / completed if completed else 0.0
+        return metrics
+
+    def read_request_head(self, client_socket, reader, requests_served):
+        """Reads the request line and headers, bounded by the idle and header timeouts."""
+        # Entre peticiones la conexion esta inactiva: se espera como maximo keep_alive_timeout
+        client_socket.settimeout(self.keep_alive_timeout if requests_served else self.header_timeout)
+        if not reader.peek(1):
+            return b""
+        # Con el primer byte de la peticion la conexion deja de estar inactiva
+        self.mark_connection(client_socket, idle=False)
+        deadline = time.monotonic() + self.header_timeout
+        request_data = b""
+        while True:
+            self.set_remaining_timeout(client_socket, deadline)
+            line = reader.readline(max_line_length)
+            if not line:
+                return b""
+            if not request_data and line == crlf.encode():
+                continue  # Lineas vacias antes de la linea de peticion
+            request_data += line
+            if line == crlf.encode():
+                return request_data  # Fin de los encabezados
+            if len(request_data) > max_head_length:
+                raise ValueError("Request head too large")
+
+    def read_request_body(self, client_socket, reader, content_length):
+        """Reads exactly content_length bytes of body before body_timeout expires."""
+        deadline = time.monotonic() + self.body_timeout
+        body = b""
+        while len(body) < content_length:
+            self.set_remaining_timeout(client_socket, deadline)
+            chunk = reader.read1(content_length - len(body))
+            if not chunk:
+                break
+            body += chunk
+        return body
+
+    def set_remaining_timeout(self, client_socket, deadline):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise socket.timeout("deadline exceeded")
+        client_socket.settimeout(remaining)
+
+    def check_rate_limit(self, client_ip, headers):
+        """Charges the request to the client IP and verified bearer token buckets; returns seconds to wait or 0."""
+        if self.ip_limiter:
+            retry_after = self.ip_limiter.acquire(client_ip)
+            if retry_after:
+                return retry_after
+        if self.token_limiter and "Authorization" in headers:
+            auth_token = headers["Authorization"].replace("Bearer ", "").strip()
+            # Solo los tokens validos tienen bucket: con tokens inventados el cliente elegiria las claves.
+            # Se identifica al token por su hash para no guardarlo ni mostrarlo en las estadisticas
+            if self.auth.verify(auth_token):
+                return self.token_limiter.acquire('token:' + hash_token(auth_token).hex()[:16])
+        return 0
+
+    def too_many_requests(self, http_version, retry_after):
+        response_body = 'Too Many Requests'
+        response_headers = [
+            "Content-Type: text/plain",
+            f"Content-Length: {len(response_body)}",
+            f"Retry-After: {math.ceil(retry_after)}",
+        ]
+        return self.build_response(http_version, 429, response_headers, response_body)
+
+    def get_rate_limit_stats(self):
+        return {
+            'ip': self.ip_limiter.stats() if self.ip_limiter else None,
+            'token': self.token_limiter.stats() if self.token_limiter else None,
+        }
+
+    def add_connection_headers(self, response, keep_alive, requests_served):
+        """Adds Connection and Keep-Alive headers advertising the server limits."""
+        status_line, rest = response.split(crlf, 1)
+        connection_headers = self.connection_header_lines(keep_alive, requests_served)
+        return status_line + crlf + crlf.join(connection_headers) + crlf + rest
+
+    def connection_header_lines(self, keep_alive, requests_served):
+        if not keep_alive:
+            return ["Connection: close"]
+        remaining = self.max_requests - requests_served
+        return [
+            "Connection: keep-alive",
+            f"Keep-Alive: timeout={self.keep_alive_timeout:g}, max={remaining}",
+        ]
+
+    def forward_request(self, route, client_socket, method, path, http_version, headers, body, keep_alive, requests_served,
+                        body_reader=None):
+        """Reverse-proxies the request to the route's upstream; returns whether to keep the connection open.
+
+        A chunked request body is streamed from body_reader, waiting at most body_timeout for each read.
+        """
+        if body_reader is not None:
+            client_socket.settimeout(self.body_timeout)
+        try:
+            return self.proxy.forward(
+                route, client_socket, method, path, http_version, headers, body,
+                lambda upstream_keep_alive: self.connection_header_lines(keep_alive and upstream_keep_alive, requests_served),
+                body_reader,
+            ) and keep_alive
+        except ProxyError as e:
+            print(f"Error forwarding request: {e}")
+            # Si el cuerpo chunked quedo a medias no se sabe donde empieza la siguiente peticion
+            keep_alive = keep_alive and body_reader is None
+            response = self.bad_gateway(http_version)
+            client_socket.sendall(self.add_connection_headers(response, keep_alive, requests_served).encode('utf-8'))
+            return keep_alive
+
+    def handle_connect(self, client_socket, reader, path, http_version):
+        """Opens a byte-level tunnel to the CONNECT target and relays until either side closes."""
+        if not self.proxy.allows_tunnel(path):
+            print(f"Tunnel to {path} refused: not in the allowed targets")
+            response_body = 'Tunnel target not allowed'
+            response_headers = [
+                "Content-Type: text/plain",
+                f"Content-Length: {len(response_body)}"
+            ]
+            response = self.build_response(http_version, 403, response_headers, response_body)
+            client_socket.sendall(self.add_connection_headers(response, False, 0).encode('utf-8'))
+            return
+        try:
+            upstream = self.proxy.open_tunnel(path)
+        except ProxyError as e:
+            print(f"Error opening tunnel: {e}")
+            response = self.add_connection_headers(self.bad_gateway(http_version), False, 0)
+            client_socket.sendall(response.encode('utf-8'))
+            return
+        client_socket.sendall(f'{http_version} 200 Connection Established{crlf}{crlf}'.encode('utf-8'))
+        # Lo que el cliente envio tras el CONNECT ya esta en el buffer del lector y el relay no lo veria
+        timeout = client_socket.gettimeout()
+        client_socket.setblocking(False)
+        try:
+            pending = reader.read1(65536)
+        except OSError:
+            pending = b""
+        finally:
+            client_socket.settimeout(timeout)
+        try:
+            if pending:
+                upstream.sendall(pending)
+        except OSError:
+            upstream.close()
+            return
+        self.proxy.tunnel(client_socket, upstream)
+
+    def bad_gateway(self, http_version):
+        response_body = 'Bad Gateway'
+        response_headers = [
+            "Content-Type: text/plain",
+            f"Content-Length: {len(response_body)}"
+        ]
+        return self.build_response(http_version, 502, response_headers, response_body)
+
+    def check_auth(self, path, http_version, headers):
+        """Runs the auth middleware before any dispatch; returns the 401 response, or None when allowed."""
+        if not self.auth.protects(path):
+            return None
+        auth_error = self.auth.authenticate(headers)
+        if not auth_error:
+            return None
+        response_body = auth_error
+        response_headers = [
+            f"Content-Type: text/plain",
+            f"Content-Length: {len(response_body)}",
+        ]
+        return self.build_response(http_version,401,response_headers,response_body)
+
     def process_request(self, method, path, http_version, headers, body, request_data):
         try: 
-            if path.startswith("/secure"):
-                if "Authorization" in headers:
-                    auth_token = headers["Authorization"].replace("Bearer ", "").strip()
-                    if auth_token != token.TOKEN:
-                        response_body = "Invalid or missing authorization token."
-                        response_headers = [
-                            f"Content-Type: text/plain",
-                            f"Content-Length: {len(response_body)}",
-                        ]
-                        return self.build_response(http_version,401,response_headers,response_body)
-                else:
-                    response_body = "Authorization header missing."
-                    response_headers = [
-                        f"Content-Type: text/plain",
-                        f"Content-Length: {len(response_body)}",
-                    ]
-                    return self.build_response(http_version,401,response_headers,response_body)
+            if method == 'GET' and path == self.rate_limit_status_path and (self.ip_limiter or self.token_limiter):
+                response_body = json.dumps(self.get_rate_limit_stats())
+                response_headers = [
+                    "Content-Type: application/json",
+                    f"Content-Length: {len(response_body)}",
+                ]
+                return self.build_response(http_version,200,response_headers,response_body)
             if method == 'GET':
                 response_body = f'Received GET request from {path}'
                 response_headers = [
@@ -239,12 +713,122 @@ class HTTPServer:
             204: 'No Content',
             400: 'Bad Request',
             401: 'Unauthorized',
+            403: 'Forbidden',
             404: 'Not Found',
             405: 'Method Not Allowed',
+            411: 'Length Required',
+            429: 'Too Many Requests',
             500: 'Internal Server Error',
-            501: 'Not Implemented'
+            501: 'Not Implemented',
+            502: 'Bad Gateway',
+            503: 'Service Unavailable'
         }.get(status_code, 'Unknown Status')
     
+def parse():
+    """Parses command-line arguments for starting the HTTP server."""
+    parser = argparse.ArgumentParser(description="Run the HTTP server.")
+
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on")
+    parser.add_argument(
+        "--header-timeout", type=float, default=10,
+        help="Seconds allowed to receive the request line and headers"
+    )
+    parser.add_argument(
+        "--body-timeout", type=float, default=10,
+        help="Seconds allowed to receive the request body"
+    )
+    parser.add_argument(
+        "--keep-alive-timeout", type=float, default=5,
+        help="Seconds an idle keep-alive connection is kept open between requests"
+    )
+    parser.add_argument(
+        "--max-requests", type=int, default=100,
+        help="Maximum number of requests served over a single connection"
+    )
+    parser.add_argument(
+        "--max-connections", type=int, default=100,
+        help="Maximum number of open connections; the oldest idle ones are closed first"
+    )
+    parser.add_argument("--certfile", type=str, help="PEM certificate chain; enables TLS")
+    parser.add_argument("--keyfile", type=str, help="PEM private key for --certfile")
+    parser.add_argument(
+        "--upstream", type=str, action="append", default=[],
+        help="Reverse-proxy a path prefix to upstream servers (e.g., '/api=127.0.0.1:9000,127.0.0.1:9001')"
+    )
+    parser.add_argument(
+        "--balance", type=str, default="round_robin", choices=["round_robin", "least_connections"],
+        help="How requests are spread across the upstreams of a prefix"
+    )
+    parser.add_argument("--tunnel", action="store_true", help="Open real byte-level tunnels for CONNECT")
+    parser.add_argument(
+        "--tunnel-allow", type=str, action="append", default=[],
+        help="HOST:PORT that CONNECT may tunnel to (repeatable); other targets get 403. Required with --tunnel"
+    )
+    parser.add_argument(
+        "--rate-limit", type=float,
+        help="Requests per second allowed per client IP; answers 429 with Retry-After when exceeded"
+    )
+    parser.add_argument("--burst", type=int, help="Bucket size for --rate-limit (defaults to the rate, at least 1)")
+    parser.add_argument("--token-rate-limit", type=float, help="Requests per second allowed per bearer token")
+    parser.add_argument("--token-burst", type=int, help="Bucket size for --token-rate-limit (defaults to the rate, at least 1)")
+    parser.add_argument(
+        "--tokens-file", type=str,
+        help="File with one accepted bearer token per line for /secure, in addition to token.TOKEN"
+    )
+    parser.add_argument(
+        "--drain-timeout", type=float, default=30,
+        help="Seconds in-flight requests get to finish on SIGTERM/SIGINT/SIGHUP before connections are closed"
+    )
+
+    args = parser.parse_args()
+    for option in ('burst', 'token_burst'):
+        if getattr(args, option) is not None and getattr(args, option) < 1:
+            parser.error(f"--{option.replace('_', '-')} must be at least 1")
+    if args.tunnel and not args.tunnel_allow:
+        parser.error("--tunnel requires at least one --tunnel-allow HOST:PORT")
+    return args
+
+
+def build_auth(args):
+    auth = TokenAuth(tokens=[token.TOKEN])
+    if args.tokens_file:
+        auth.load_tokens(args.tokens_file)
+    return auth
+
+
+def build_proxy(args):
+    if not args.upstream and not args.tunnel:
+        return None
+    routes = {}
+    for upstream in args.upstream:
+        prefix, servers = upstream.split('=', 1)
+        routes[prefix] = servers.split(',')
+    return ReverseProxy(routes, balance=args.balance, allow_connect=args.tunnel, tunnel_allow=args.tunnel_allow)
+
+
 if __name__ == '__main__':
-    server = HTTPServer()
+    args = parse()
+    listen_fd = os.environ.pop(listen_fd_variable, None)
+    ready_fd = os.environ.pop(ready_fd_variable, None)
+    server = HTTPServer(
+        host=args.host,
+        port=args.port,
+        header_timeout=args.header_timeout,
+        body_timeout=args.body_timeout,
+        keep_alive_timeout=args.keep_alive_timeout,
+        max_requests=args.max_requests,
+        max_connections=args.max_connections,
+        certfile=args.certfile,
+        keyfile=args.keyfile,
+        proxy=build_proxy(args),
+        auth=build_auth(args),
+        ip_limiter=RateLimiter(args.rate_limit, args.burst) if args.rate_limit else None,
+        token_limiter=RateLimiter(args.token_rate_limit, args.token_burst) if args.token_rate_limit else None,
+        drain_timeout=args.drain_timeout,
+        listen_fd=int(listen_fd) if listen_fd is not None else None,
+    )
+    server.install_signal_handlers()
+    if ready_fd is not None:
+        server.notify_ready(int(ready_fd))
     server.start()
\ No newline at end of file
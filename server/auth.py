@@ -0,0 +1,99 @@
+import hashlib
+import hmac
+import time
+from collections import OrderedDict
+from threading import Lock
+
+# Bytes del digest usados como clave del indice; el digest completo se compara con compare_digest
+index_prefix_length = 8
+
+
+class TokenCache:
+    """Bounded LRU cache of verified token digests whose entries expire after ttl seconds."""
+
+    def __init__(self, max_size=10000, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = Lock()
+
+    def __contains__(self, digest):
+        with self.lock:
+            expires = self.entries.get(digest)
+            if expires is None:
+                return False
+            if expires < time.monotonic():
+                del self.entries[digest]
+                return False
+            self.entries.move_to_end(digest)
+            return True
+
+    def add(self, digest):
+        with self.lock:
+            self.entries[digest] = time.monotonic() + self.ttl
+            self.entries.move_to_end(digest)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class TokenAuth:
+    """Bearer-token check for protected path prefixes.
+
+    Static tokens are kept only as SHA-256 digests in an index; tokens that are not in it are
+    passed to the optional verifier (e.g. an HMAC or JWT signature check) and cached on success.
+    """
+
+    def __init__(self, tokens=(), verifier=None, protected_prefix='/secure', cache=None):
+        self.verifier = verifier
+        self.protected_prefix = protected_prefix
+        self.cache = cache if cache is not None else TokenCache()
+        self.index = {}
+        for auth_token in tokens:
+            self.add_token(auth_token)
+
+    def add_token(self, auth_token):
+        digest = hash_token(auth_token)
+        self.index.setdefault(digest[:index_prefix_length], []).append(digest)
+
+    def load_tokens(self, path):
+        """Adds one token per line from path, skipping blank lines and '#' comments."""
+        with open(path, encoding='utf-8') as tokens_file:
+            for line in tokens_file:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    self.add_token(line)
+
+    def protects(self, path):
+        return path.startswith(self.protected_prefix)
+
+    def authenticate(self, headers):
+        """Returns None when the request is authorized, otherwise the error message for the 401."""
+        if "Authorization" not in headers:
+            return "Authorization header missing."
+        auth_token = headers["Authorization"].replace("Bearer ", "").strip()
+        if not self.verify(auth_token):
+            return "Invalid or missing authorization token."
+        return None
+
+    def verify(self, auth_token):
+        digest = hash_token(auth_token)
+        valid = False
+        for known in self.index.get(digest[:index_prefix_length], ()):
+            valid |= hmac.compare_digest(known, digest)
+        if valid:
+            return True
+        if self.verifier is None:
+            return False
+        if digest in self.cache:
+            return True
+        if self.verifier(auth_token):
+            self.cache.add(digest)
+            return True
+        return False
+
+
+def hash_token(auth_token):
+    return hashlib.sha256(auth_token.encode('utf-8')).digest()
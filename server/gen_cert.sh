@@ -0,0 +1,13 @@
+#!/bin/sh
+
+# Genera un certificado autofirmado para probar el servidor con TLS:
+#   ./server/gen_cert.sh && python3 server/HTTPServer.py --certfile server/cert.pem --keyfile server/key.pem
+# y el cliente confia en el mediante --cafile:
+#   python3 client/ClientHttp.py -m GET -u https://localhost:8080/ --cafile server/cert.pem
+
+DIR=$(dirname "$0")
+
+openssl req -x509 -newkey rsa:2048 -nodes -days 365 \
+  -keyout "${DIR}/key.pem" -out "${DIR}/cert.pem" \
+  -subj "/CN=localhost" \
+  -addext "subjectAltName=DNS:localhost,IP:127.0.0.1"
@@ -0,0 +1,754 @@
+import base64
+import socket
+import struct
+import time
+from collections import deque
+from threading import Thread, Lock, RLock, Condition
+
+crlf = '\r\n'
+
+connection_preface = b'PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n'
+# Lo que queda del prefacio cuando el servidor ya leyo "PRI * HTTP/2.0\r\n\r\n" como cabecera HTTP/1.1
+preface_tail = b'SM\r\n\r\n'
+
+# Tipos de frame (RFC 9113, seccion 6)
+frame_data = 0x0
+frame_headers = 0x1
+frame_priority = 0x2
+frame_rst_stream = 0x3
+frame_settings = 0x4
+frame_push_promise = 0x5
+frame_ping = 0x6
+frame_goaway = 0x7
+frame_window_update = 0x8
+frame_continuation = 0x9
+
+flag_end_stream = 0x1
+flag_ack = 0x1
+flag_end_headers = 0x4
+flag_padded = 0x8
+flag_priority = 0x20
+
+settings_header_table_size = 0x1
+settings_enable_push = 0x2
+settings_max_concurrent_streams = 0x3
+settings_initial_window_size = 0x4
+settings_max_frame_size = 0x5
+settings_max_header_list_size = 0x6
+
+no_error = 0x0
+protocol_error = 0x1
+internal_error = 0x2
+flow_control_error = 0x3
+stream_closed = 0x5
+frame_size_error = 0x6
+refused_stream = 0x7
+compression_error = 0x9
+enhance_your_calm = 0xb
+
+default_window_size = 65535
+default_max_frame_size = 16384
+max_window_size = 2 ** 31 - 1
+# Igual que el limite de la cabecera HTTP/1.1 del servidor
+default_max_header_list_size = 65536
+
+# Encabezados propios de HTTP/1.1 que no existen en HTTP/2 (RFC 9113, seccion 8.2.2)
+connection_specific_headers = {'connection', 'keep-alive', 'proxy-connection', 'transfer-encoding', 'upgrade'}
+
+
+class H2Error(Exception):
+    """Connection error; the connection is closed with a GOAWAY carrying error_code."""
+
+    def __init__(self, error_code, message):
+        super().__init__(message)
+        self.error_code = error_code
+
+
+class HpackError(H2Error):
+    def __init__(self, message):
+        super().__init__(compression_error, message)
+
+
+# --- HPACK (RFC 7541) ---
+
+static_table = (
+    (':authority', ''), (':method', 'GET'), (':method', 'POST'), (':path', '/'),
+    (':path', '/index.html'), (':scheme', 'http'), (':scheme', 'https'), (':status', '200'),
+    (':status', '204'), (':status', '206'), (':status', '304'), (':status', '400'),
+    (':status', '404'), (':status', '500'), ('accept-charset', ''), ('accept-encoding', 'gzip, deflate'),
+    ('accept-language', ''), ('accept-ranges', ''), ('accept', ''), ('access-control-allow-origin', ''),
+    ('age', ''), ('allow', ''), ('authorization', ''), ('cache-control', ''),
+    ('content-disposition', ''), ('content-encoding', ''), ('content-language', ''), ('content-length', ''),
+    ('content-location', ''), ('content-range', ''), ('content-type', ''), ('cookie', ''),
+    ('date', ''), ('etag', ''), ('expect', ''), ('expires', ''),
+    ('from', ''), ('host', ''), ('if-match', ''), ('if-modified-since', ''),
+    ('if-none-match', ''), ('if-range', ''), ('if-unmodified-since', ''), ('last-modified', ''),
+    ('link', ''), ('location', ''), ('max-forwards', ''), ('proxy-authenticate', ''),
+    ('proxy-authorization', ''), ('range', ''), ('referer', ''), ('refresh', ''),
+    ('retry-after', ''), ('server', ''), ('set-cookie', ''), ('strict-transport-security', ''),
+    ('transfer-encoding', ''), ('user-agent', ''), ('vary', ''), ('via', ''),
+    ('www-authenticate', ''),
+)
+static_exact_index = {entry: index for index, entry in reversed(list(enumerate(static_table, 1)))}
+static_name_index = {name: index for index, (name, _) in reversed(list(enumerate(static_table, 1)))}
+
+# Longitud del codigo Huffman de cada simbolo (Apendice B); el codigo es canonico, asi que
+# basta con las longitudes para reconstruirlo. El simbolo 256 es EOS.
+huffman_code_lengths = (
+    13, 23, 28, 28, 28, 28, 28, 28, 28, 24, 30, 28, 28, 30, 28, 28,
+    28, 28, 28, 28, 28, 28, 30, 28, 28, 28, 28, 28, 28, 28, 28, 28,
+    6, 10, 10, 12, 13, 6, 8, 11, 10, 10, 8, 11, 8, 6, 6, 6,
+    5, 5, 5, 6, 6, 6, 6, 6, 6, 6, 7, 8, 15, 6, 12, 10,
+    13, 6, 7, 7, 7, 7, 7, 7, 7, 7, 7, 7, 7, 7, 7, 7,
+    7, 7, 7, 7, 7, 7, 7, 7, 8, 7, 8, 13, 19, 13, 14, 6,
+    15, 5, 6, 5, 6, 5, 6, 6, 6, 5, 7, 7, 6, 6, 6, 5,
+    6, 7, 6, 5, 5, 6, 7, 7, 7, 7, 7, 15, 11, 14, 13, 28,
+    20, 22, 20, 20, 22, 22, 22, 23, 22, 23, 23, 23, 23, 23, 24, 23,
+    24, 24, 22, 23, 24, 23, 23, 23, 23, 21, 22, 23, 22, 23, 23, 24,
+    22, 21, 20, 22, 22, 23, 23, 21, 23, 22, 22, 24, 21, 22, 23, 23,
+    21, 21, 22, 21, 23, 22, 23, 23, 20, 22, 22, 22, 23, 22, 22, 23,
+    26, 26, 20, 19, 22, 23, 22, 25, 26, 26, 26, 27, 27, 26, 24, 25,
+    19, 21, 26, 27, 27, 26, 27, 24, 21, 21, 26, 26, 28, 27, 27, 27,
+    20, 24, 20, 21, 22, 21, 21, 23, 22, 22, 25, 25, 24, 24, 26, 23,
+    26, 27, 26, 26, 27, 27, 27, 27, 27, 28, 27, 27, 27, 27, 27, 26,
+    30,
+)
+huffman_eos = 256
+
+
+def build_huffman_decoding():
+    """Returns, per code length, the first canonical code, how many codes have that length and
+    the offset of their symbols in the sorted symbol list."""
+    symbols = sorted(range(len(huffman_code_lengths)), key=lambda symbol: (huffman_code_lengths[symbol], symbol))
+    first_code, code_count, symbol_offset = {}, {}, {}
+    code = 0
+    previous_length = 0
+    for position, symbol in enumerate(symbols):
+        length = huffman_code_lengths[symbol]
+        code <<= length - previous_length
+        if length not in first_code:
+            first_code[length] = code
+            code_count[length] = 0
+            symbol_offset[length] = position
+        code_count[length] += 1
+        code += 1
+        previous_length = length
+    max_length = max(huffman_code_lengths)
+    limits = [None] * (max_length + 1)
+    for length in first_code:
+        limits[length] = (first_code[length], first_code[length] + code_count[length], symbol_offset[length])
+    return symbols, limits
+
+
+huffman_symbols, huffman_limits = build_huffman_decoding()
+
+
+def huffman_decode(data):
+    decoded = bytearray()
+    code = 0
+    length = 0
+    for byte in data:
+        for shift in range(7, -1, -1):
+            code = (code << 1) | ((byte >> shift) & 1)
+            length += 1
+            limit = huffman_limits[length] if length < len(huffman_limits) else None
+            if limit is not None and limit[0] <= code < limit[1]:
+                symbol = huffman_symbols[limit[2] + code - limit[0]]
+                if symbol == huffman_eos:
+                    raise HpackError("EOS symbol in Huffman string")
+                decoded.append(symbol)
+                code = 0
+                length = 0
+            elif length >= len(huffman_limits):
+                raise HpackError("Invalid Huffman code")
+    # El relleno final debe ser un prefijo de EOS (solo unos) de menos de 8 bits
+    if length > 7 or code != (1 << length) - 1:
+        raise HpackError("Invalid Huffman padding")
+    return bytes(decoded)
+
+
+def encode_integer(value, prefix_bits, flags=0):
+    limit = (1 << prefix_bits) - 1
+    if value < limit:
+        return bytes((flags | value,))
+    encoded = bytearray((flags | limit,))
+    value -= limit
+    while value >= 128:
+        encoded.append((value & 0x7f) | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def decode_integer(data, position, prefix_bits):
+    if position >= len(data):
+        raise HpackError("Truncated integer")
+    limit = (1 << prefix_bits) - 1
+    value = data[position] & limit
+    position += 1
+    if value < limit:
+        return value, position
+    shift = 0
+    while True:
+        if position >= len(data) or shift > 28:
+            raise HpackError("Invalid integer")
+        byte = data[position]
+        position += 1
+        value += (byte & 0x7f) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, position
+
+
+def encode_string(value):
+    # Sin Huffman: el receptor lo decodifica igual y evitamos el coste de codificar
+    encoded = value.encode('utf-8')
+    return encode_integer(len(encoded), 7) + encoded
+
+
+def decode_string(data, position):
+    huffman = data[position] & 0x80 if position < len(data) else 0
+    length, position = decode_integer(data, position, 7)
+    if position + length > len(data):
+        raise HpackError("Truncated string")
+    raw = data[position:position + length]
+    value = huffman_decode(raw) if huffman else bytes(raw)
+    return value.decode('utf-8'), position + length
+
+
+class Encoder:
+    """HPACK encoder that never inserts into the dynamic table, so it is safe to share across streams."""
+
+    sensitive_headers = {'authorization', 'proxy-authorization', 'cookie', 'set-cookie'}
+
+    def encode(self, headers):
+        block = bytearray()
+        for name, value in headers:
+            name = name.lower()
+            index = static_exact_index.get((name, value))
+            if index:
+                block += encode_integer(index, 7, 0x80)
+                continue
+            # Literal sin indexar; los encabezados con credenciales como "nunca indexado"
+            flags = 0x10 if name in self.sensitive_headers else 0x00
+            name_index = static_name_index.get(name)
+            if name_index:
+                block += encode_integer(name_index, 4, flags)
+            else:
+                block += encode_integer(0, 4, flags) + encode_string(name)
+            block += encode_string(value)
+        return bytes(block)
+
+
+class Decoder:
+    """HPACK decoder with the dynamic table; one per connection, used only by the reading thread."""
+
+    def __init__(self, max_table_size=4096):
+        self.max_table_size = max_table_size
+        self.table_size_limit = max_table_size
+        self.dynamic_table = deque()
+        self.table_size = 0
+
+    def decode(self, block):
+        headers = []
+        position = 0
+        while position < len(block):
+            byte = block[position]
+            if byte & 0x80:
+                index, position = decode_integer(block, position, 7)
+                headers.append(self.lookup(index))
+            elif byte & 0x40:
+                name, value, position = self.decode_literal(block, position, 6)
+                self.add(name, value)
+                headers.append((name, value))
+            elif byte & 0x20:
+                size, position = decode_integer(block, position, 5)
+                if size > self.table_size_limit:
+                    raise HpackError("Dynamic table size update above the advertised limit")
+                self.max_table_size = size
+                self.evict(0)
+            else:
+                name, value, position = self.decode_literal(block, position, 4)
+                headers.append((name, value))
+        return headers
+
+    def decode_literal(self, block, position, prefix_bits):
+        name_index, position = decode_integer(block, position, prefix_bits)
+        if name_index:
+            name = self.lookup(name_index)[0]
+        else:
+            name, position = decode_string(block, position)
+        value, position = decode_string(block, position)
+        return name, value, position
+
+    def lookup(self, index):
+        if 0 < index <= len(static_table):
+            return static_table[index - 1]
+        dynamic_index = index - len(static_table) - 1
+        if 0 <= dynamic_index < len(self.dynamic_table):
+            return self.dynamic_table[dynamic_index]
+        raise HpackError(f"Invalid header index {index}")
+
+    def add(self, name, value):
+        size = 32 + len(name.encode('utf-8')) + len(value.encode('utf-8'))
+        self.evict(size)
+        if size <= self.max_table_size:
+            self.dynamic_table.appendleft((name, value))
+            self.table_size += size
+
+    def evict(self, incoming_size):
+        while self.dynamic_table and self.table_size + incoming_size > self.max_table_size:
+            name, value = self.dynamic_table.pop()
+            self.table_size -= 32 + len(name.encode('utf-8')) + len(value.encode('utf-8'))
+
+
+# --- Frames y control de flujo (RFC 9113) ---
+
+def pack_frame(frame_type, flags, stream_id, payload=b''):
+    return struct.pack('>I', len(payload))[1:] + struct.pack('>BBI', frame_type, flags, stream_id & 0x7fffffff) + payload
+
+
+def pack_settings(settings):
+    return b''.join(struct.pack('>HI', key, value) for key, value in settings.items())
+
+
+def parse_settings(payload):
+    if len(payload) % 6:
+        raise H2Error(frame_size_error, "SETTINGS payload is not a multiple of 6")
+    return dict(struct.iter_unpack('>HI', payload))
+
+
+def strip_padding(flags, payload):
+    if not flags & flag_padded:
+        return payload
+    if not payload or payload[0] >= len(payload):
+        raise H2Error(protocol_error, "Invalid padding")
+    return payload[1:len(payload) - payload[0]]
+
+
+class H2Stream:
+    def __init__(self, stream_id, send_window):
+        self.stream_id = stream_id
+        self.send_window = send_window
+        self.headers = []
+        self.data = bytearray()
+        self.ended = False
+        self.reset = False
+        self.opened = time.monotonic()
+
+
+class H2Connection:
+    """Frame reading, HPACK state, settings and flow control shared by the server and the client.
+
+    Subclasses decide what to do with new streams and complete requests/responses through
+    open_stream, stream_ended and stream_reset, and how to wait for send window in wait_for_window.
+    """
+
+    def __init__(self, sock, initial_data=b'', local_settings=None):
+        self.sock = sock
+        # HEADERS y DATA salen en escrituras separadas: con Nagle y el ACK retardado el DATA esperaria ~40 ms
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except OSError:
+            pass
+        self.buffer = bytearray(initial_data)
+        self.encoder = Encoder()
+        self.decoder = Decoder()
+        self.streams = {}
+        self.send_lock = Lock()
+        self.window_changed = Condition(RLock())
+        self.send_window = default_window_size
+        self.peer_settings = {
+            settings_initial_window_size: default_window_size,
+            settings_max_frame_size: default_max_frame_size,
+        }
+        self.local_settings = local_settings or {}
+        self.header_block = None
+        self.header_block_started = None
+        self.goaway_received = False
+        self.closed = False
+
+    def receive(self, size):
+        while len(self.buffer) < size:
+            try:
+                chunk = self.sock.recv(65536)
+            except socket.timeout:
+                if self.keep_waiting():
+                    continue
+                raise
+            if not chunk:
+                raise ConnectionError("connection closed by peer")
+            self.buffer += chunk
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+    def keep_waiting(self):
+        # Solo se cierra por inactividad si no queda ningun stream en curso
+        return bool(self.streams)
+
+    def read_frame(self):
+        header = self.receive(9)
+        length = int.from_bytes(header[:3], 'big')
+        frame_type, flags = header[3], header[4]
+        stream_id = int.from_bytes(header[5:9], 'big') & 0x7fffffff
+        if length > self.local_settings.get(settings_max_frame_size, default_max_frame_size):
+            raise H2Error(frame_size_error, f"Frame of {length} bytes exceeds SETTINGS_MAX_FRAME_SIZE")
+        return frame_type, flags, stream_id, self.receive(length)
+
+    def send_frame(self, frame_type, flags, stream_id, payload=b''):
+        with self.send_lock:
+            self.sock.sendall(pack_frame(frame_type, flags, stream_id, payload))
+
+    def send_settings(self):
+        self.send_frame(frame_settings, 0, 0, pack_settings(self.local_settings))
+
+    def send_goaway(self, last_stream_id, error_code=no_error):
+        try:
+            self.send_frame(frame_goaway, 0, 0, struct.pack('>II', last_stream_id, error_code))
+        except OSError:
+            pass
+
+    def send_headers(self, stream_id, headers, end_stream):
+        block = self.encoder.encode(headers)
+        max_frame_size = self.peer_settings[settings_max_frame_size]
+        fragments = [block[offset:offset + max_frame_size] for offset in range(0, len(block), max_frame_size)] or [b'']
+        frames = []
+        for position, fragment in enumerate(fragments):
+            last = position == len(fragments) - 1
+            flags = flag_end_headers if last else 0
+            if position == 0:
+                frames.append(pack_frame(frame_headers, flags | (flag_end_stream if end_stream else 0), stream_id, fragment))
+            else:
+                frames.append(pack_frame(frame_continuation, flags, stream_id, fragment))
+        # El bloque de encabezados debe llegar sin frames de otros streams intercalados
+        with self.send_lock:
+            self.sock.sendall(b''.join(frames))
+
+    def send_data(self, stream, data, end_stream=True):
+        """Sends data in frames that fit both the connection and the stream send windows."""
+        if not data:
+            self.send_frame(frame_data, flag_end_stream if end_stream else 0, stream.stream_id)
+            return
+        view = memoryview(data)
+        offset = 0
+        while offset < len(view):
+            with self.window_changed:
+                while True:
+                    if stream.reset:
+                        return
+                    size = min(self.send_window, stream.send_window,
+                               self.peer_settings[settings_max_frame_size], len(view) - offset)
+                    if size > 0:
+                        break
+                    if self.closed:
+                        raise ConnectionError("connection closed while waiting for flow-control window")
+                    self.wait_for_window()
+                self.send_window -= size
+                stream.send_window -= size
+            last = offset + size == len(view)
+            self.send_frame(frame_data, flag_end_stream if last and end_stream else 0, stream.stream_id,
+                            view[offset:offset + size])
+            offset += size
+
+    def wait_for_window(self):
+        self.window_changed.wait(1)
+
+    def handle_frame(self, frame_type, flags, stream_id, payload):
+        if self.header_block is not None and frame_type != frame_continuation:
+            raise H2Error(protocol_error, "Expected CONTINUATION frame")
+        if frame_type == frame_data:
+            self.handle_data(flags, stream_id, payload)
+        elif frame_type == frame_headers:
+            if not stream_id:
+                raise H2Error(protocol_error, "HEADERS on stream 0")
+            block = strip_padding(flags, payload)
+            if flags & flag_priority:
+                block = block[5:]
+            self.header_block = (stream_id, flags, bytearray(block))
+            self.header_block_started = time.monotonic()
+            self.check_header_list_size(len(block))
+            if flags & flag_end_headers:
+                self.complete_header_block()
+        elif frame_type == frame_continuation:
+            if self.header_block is None or self.header_block[0] != stream_id:
+                raise H2Error(protocol_error, "Unexpected CONTINUATION frame")
+            self.header_block[2].extend(payload)
+            self.check_header_list_size(len(self.header_block[2]))
+            if flags & flag_end_headers:
+                self.complete_header_block()
+        elif frame_type == frame_rst_stream:
+            stream = self.streams.get(stream_id)
+            if stream:
+                with self.window_changed:
+                    stream.reset = True
+                    self.window_changed.notify_all()
+                self.stream_reset(stream)
+        elif frame_type == frame_settings:
+            if not flags & flag_ack:
+                self.apply_settings(parse_settings(payload))
+                self.send_frame(frame_settings, flag_ack, 0)
+        elif frame_type == frame_ping:
+            if not flags & flag_ack:
+                self.send_frame(frame_ping, flag_ack, 0, payload)
+        elif frame_type == frame_goaway:
+            with self.window_changed:
+                self.goaway_received = True
+                self.window_changed.notify_all()
+        elif frame_type == frame_window_update:
+            self.handle_window_update(stream_id, payload)
+        elif frame_type == frame_push_promise:
+            raise H2Error(protocol_error, "PUSH_PROMISE is not accepted")
+        # PRIORITY y los tipos desconocidos se ignoran
+
+    def handle_data(self, flags, stream_id, payload):
+        stream = self.streams.get(stream_id)
+        # Se devuelve la ventana enseguida: el cuerpo ya esta en memoria
+        if payload:
+            self.send_frame(frame_window_update, 0, 0, struct.pack('>I', len(payload)))
+        if stream is None or stream.ended:
+            self.send_frame(frame_rst_stream, 0, stream_id, struct.pack('>I', stream_closed))
+            return
+        stream.data += strip_padding(flags, payload)
+        if flags & flag_end_stream:
+            stream.ended = True
+            self.stream_ended(stream)
+        elif payload:
+            self.send_frame(frame_window_update, 0, stream_id, struct.pack('>I', len(payload)))
+
+    def complete_header_block(self):
+        stream_id, flags, block = self.header_block
+        self.header_block = None
+        headers = self.decoder.decode(block)
+        self.check_header_list_size(sum(32 + len(name.encode('utf-8')) + len(value.encode('utf-8'))
+                                        for name, value in headers))
+        stream = self.streams.get(stream_id)
+        if stream is None:
+            stream = self.open_stream(stream_id)
+            if stream is None:
+                return
+        if not stream.headers:
+            stream.headers = headers
+        if flags & flag_end_stream:
+            stream.ended = True
+            self.stream_ended(stream)
+
+    def check_header_list_size(self, size):
+        """Bounds both the buffered header block and the decoded list by SETTINGS_MAX_HEADER_LIST_SIZE."""
+        limit = self.local_settings.get(settings_max_header_list_size)
+        if limit is not None and size > limit:
+            raise H2Error(enhance_your_calm, f"Header list of {size} bytes exceeds SETTINGS_MAX_HEADER_LIST_SIZE")
+
+    def apply_settings(self, settings):
+        with self.window_changed:
+            if settings_initial_window_size in settings:
+                new_window = settings[settings_initial_window_size]
+                if new_window > max_window_size:
+                    raise H2Error(flow_control_error, "SETTINGS_INITIAL_WINDOW_SIZE too large")
+                delta = new_window - self.peer_settings[settings_initial_window_size]
+                for stream in self.streams.values():
+                    stream.send_window += delta
+            self.peer_settings.update(settings)
+            self.window_changed.notify_all()
+
+    def handle_window_update(self, stream_id, payload):
+        if len(payload) != 4:
+            raise H2Error(frame_size_error, "WINDOW_UPDATE payload must be 4 bytes")
+        increment = int.from_bytes(payload, 'big') & 0x7fffffff
+        with self.window_changed:
+            if stream_id == 0:
+                self.send_window += increment
+                if self.send_window > max_window_size:
+                    raise H2Error(flow_control_error, "Connection window overflow")
+            elif stream_id in self.streams:
+                self.streams[stream_id].send_window += increment
+            self.window_changed.notify_all()
+
+    def open_stream(self, stream_id):
+        return None
+
+    def stream_ended(self, stream):
+        pass
+
+    def stream_reset(self, stream):
+        pass
+
+
+def split_response(response):
+    """Splits an HTTP/1.1 response built by HTTPServer into (status, header list, body bytes)."""
+    head, _, body = response.partition(crlf + crlf)
+    status_line, *header_lines = head.split(crlf)
+    status = int(status_line.split(' ', 2)[1])
+    body = body.encode('utf-8')
+    headers = []
+    for line in header_lines:
+        if ': ' in line:
+            key, value = line.split(': ', 1)
+            key = key.lower()
+            if key in connection_specific_headers:
+                continue
+            # process_request cuenta caracteres; en HTTP/2 la longitud tiene que coincidir con los DATA
+            if key == 'content-length' and body:
+                value = str(len(body))
+            headers.append((key, value))
+    return status, headers, body
+
+
+def canonical_header_name(name):
+    # process_request busca los encabezados como "Content-Type", HTTP/2 los envia en minusculas
+    return '-'.join(part.capitalize() for part in name.split('-'))
+
+
+def decode_http2_settings(value):
+    """Decodes the HTTP2-Settings header sent with Upgrade: h2c (base64url SETTINGS payload)."""
+    return parse_settings(base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)))
+
+
+class H2ServerConnection(H2Connection):
+    """Serves one HTTP/2 connection, answering every stream from its own thread via HTTPServer."""
+
+    def __init__(self, server, sock, client_address, initial_data=b'', max_concurrent_streams=100,
+                 max_header_list_size=default_max_header_list_size):
+        super().__init__(sock, initial_data, {
+            settings_max_concurrent_streams: max_concurrent_streams,
+            settings_initial_window_size: default_window_size,
+            settings_max_frame_size: default_max_frame_size,
+            settings_max_header_list_size: max_header_list_size,
+        })
+        self.server = server
+        self.client_address = client_address
+        self.max_concurrent_streams = max_concurrent_streams
+        self.last_stream_id = 0
+        self.workers = []
+        self.streams_lock = Lock()
+        self.draining = False
+
+    def serve(self, expected_preface, upgraded_request=None):
+        """Runs the connection until the client closes it, sends GOAWAY or stays idle."""
+        error_code = no_error
+        try:
+            self.send_settings()
+            if upgraded_request:
+                self.start_upgraded_stream(*upgraded_request)
+            if self.receive(len(expected_preface)) != expected_preface:
+                raise H2Error(protocol_error, "Invalid connection preface")
+            # Tras un GOAWAY se sigue leyendo para recibir WINDOW_UPDATE de los streams en curso
+            while True:
+                self.handle_frame(*self.read_frame())
+                if self.request_expired():
+                    raise socket.timeout("request deadline exceeded")
+        except H2Error as e:
+            print(f"HTTP/2 connection error: {e}")
+            error_code = e.error_code
+        except (ConnectionError, socket.timeout):
+            pass
+        finally:
+            with self.window_changed:
+                self.closed = True
+                self.window_changed.notify_all()
+            for worker in self.workers:
+                worker.join()
+            self.send_goaway(self.last_stream_id, error_code)
+
+    def keep_waiting(self):
+        return not self.request_expired() and super().keep_waiting()
+
+    def request_expired(self):
+        """True when a header block outlives header_timeout or a request body outlives body_timeout."""
+        # Mismos limites que HTTP/1.1: un cliente lento no retiene la conexion con un stream a medio enviar
+        now = time.monotonic()
+        if self.header_block is not None and now - self.header_block_started >= self.server.header_timeout:
+            return True
+        with self.streams_lock:
+            receiving = [stream for stream in self.streams.values() if not stream.ended]
+        return any(now - stream.opened >= self.server.body_timeout for stream in receiving)
+
+    def drain(self):
+        """Sends GOAWAY and closes the connection as soon as the streams in flight are answered."""
+        self.draining = True
+        self.send_goaway(self.last_stream_id)
+        self.close_if_drained()
+
+    def close_if_drained(self):
+        with self.streams_lock:
+            drained = self.draining and not self.streams
+        if drained:
+            # El lector ve EOF y serve() termina; las respuestas ya enviadas no se pierden
+            try:
+                socket.socket.shutdown(self.sock, socket.SHUT_RD)
+            except OSError:
+                pass
+
+    def start_upgraded_stream(self, method, path, headers, body):
+        # La peticion que llego con Upgrade: h2c se responde en el stream 1 (RFC 7540, seccion 3.2)
+        if 'HTTP2-Settings' in headers:
+            self.apply_settings(decode_http2_settings(headers['HTTP2-Settings']))
+        stream = self.open_stream(1)
+        stream.headers = [(':method', method), (':path', path)] + [
+            (key.lower(), value) for key, value in headers.items()
+            if key.lower() not in connection_specific_headers and key != 'HTTP2-Settings'
+        ]
+        stream.data += body.encode('utf-8')
+        stream.ended = True
+        self.stream_ended(stream)
+
+    def open_stream(self, stream_id):
+        if stream_id % 2 == 0 or stream_id <= self.last_stream_id:
+            raise H2Error(protocol_error, f"Invalid stream id {stream_id}")
+        self.last_stream_id = stream_id
+        stream = H2Stream(stream_id, self.peer_settings[settings_initial_window_size])
+        with self.streams_lock:
+            if self.draining or len(self.streams) >= self.max_concurrent_streams:
+                self.send_frame(frame_rst_stream, 0, stream_id, struct.pack('>I', refused_stream))
+                return None
+            self.streams[stream_id] = stream
+        return stream
+
+    def stream_reset(self, stream):
+        # Un stream que ya termino lo retira su hilo al responder
+        if not stream.ended:
+            with self.streams_lock:
+                self.streams.pop(stream.stream_id, None)
+            self.close_if_drained()
+
+    def stream_ended(self, stream):
+        self.workers = [worker for worker in self.workers if worker.is_alive()]
+        worker = Thread(target=self.respond, args=(stream,))
+        self.workers.append(worker)
+        worker.start()
+
+    def respond(self, stream):
+        try:
+            pseudo = {}
+            headers = {}
+            for name, value in stream.headers:
+                if name.startswith(':'):
+                    pseudo[name] = value
+                elif name == 'cookie' and canonical_header_name(name) in headers:
+                    # RFC 9113, seccion 8.2.3: los campos cookie divididos se unen con '; '
+                    headers[canonical_header_name(name)] += '; ' + value
+                else:
+                    headers[canonical_header_name(name)] = value
+            if ':authority' in pseudo:
+                headers.setdefault('Host', pseudo[':authority'])
+            method = pseudo.get(':method', '')
+            path = pseudo.get(':path', '/')
+            response = self.server.process_http2_request(self.client_address, method, path, headers,
+                                                         stream.data.decode('utf-8'))
+            status, response_headers, body = split_response(response)
+            send_body = method != 'HEAD' and bool(body)
+            self.send_headers(stream.stream_id, [(':status', str(status))] + response_headers, end_stream=not send_body)
+            if send_body:
+                self.send_data(stream, body)
+        except OSError:
+            pass
+        except Exception as e:
+            print(f"Error handling HTTP/2 stream {stream.stream_id}: {e}")
+            try:
+                self.send_frame(frame_rst_stream, 0, stream.stream_id, struct.pack('>I', internal_error))
+            except OSError:
+                pass
+        finally:
+            with self.streams_lock:
+                self.streams.pop(stream.stream_id, None)
+            self.close_if_drained()
@@ -0,0 +1,387 @@
+import os
+import select
+import socket
+import ssl
+import time
+from collections import deque
+from itertools import count
+from threading import Thread, Lock
+
+crlf = '\r\n'
+relay_chunk_size = 65536
+max_line_length = 8192
+
+# Encabezados que describen una sola conexion y no se reenvian (RFC 9110, seccion 7.6.1)
+hop_by_hop_headers = {
+    'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization',
+    'te', 'trailer', 'transfer-encoding', 'upgrade',
+}
+
+
+class ProxyError(Exception):
+    """Raised when the upstream cannot be reached before anything was sent to the client."""
+
+
+class UpstreamPool:
+    """Pool of keep-alive connections to a single upstream server."""
+
+    def __init__(self, host, port, max_idle=8, idle_timeout=30, timeout=10):
+        self.host = host
+        self.port = port
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.active = 0
+        # (socket, reader, instante en que quedo libre)
+        self.idle = deque()
+        self.lock = Lock()
+
+    def acquire(self, fresh=False):
+        """Returns (socket, reader, reused), preferring the most recently released connection.
+
+        fresh=True always opens a new connection, for requests that cannot be retried.
+        """
+        with self.lock:
+            self.active += 1
+            while not fresh and self.idle:
+                upstream, reader, since = self.idle.pop()
+                if time.monotonic() - since < self.idle_timeout:
+                    return upstream, reader, True
+                self.close(upstream, reader)
+        try:
+            upstream = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        except OSError:
+            with self.lock:
+                self.active -= 1
+            raise
+        return upstream, upstream.makefile('rb'), False
+
+    def release(self, upstream, reader, reusable):
+        with self.lock:
+            self.active -= 1
+            if reusable and len(self.idle) < self.max_idle:
+                self.idle.append((upstream, reader, time.monotonic()))
+                return
+        self.close(upstream, reader)
+
+    def close(self, upstream, reader):
+        reader.close()
+        upstream.close()
+
+    def __repr__(self):
+        return f"{self.host}:{self.port}"
+
+
+class ReverseProxy:
+    """Forwards requests under configured path prefixes to upstream servers and tunnels CONNECT."""
+
+    def __init__(self, routes=None, balance='round_robin', allow_connect=False, tunnel_allow=(), timeout=10,
+                 tunnel_idle_timeout=60):
+        if balance not in ('round_robin', 'least_connections'):
+            raise ValueError(f"Unknown balancing strategy: {balance}")
+        self.balance = balance
+        self.allow_connect = allow_connect
+        # Destinos host:port permitidos para CONNECT; sin lista el proxy seria abierto hacia la red interna
+        self.tunnel_allow = {tunnel_target(target) for target in tunnel_allow}
+        self.timeout = timeout
+        self.tunnel_idle_timeout = tunnel_idle_timeout
+        self.routes = []
+        for prefix, upstreams in (routes or {}).items():
+            pools = [UpstreamPool(*parse_address(upstream), timeout=timeout) for upstream in upstreams]
+            self.routes.append((prefix, pools, count()))
+        # El prefijo mas largo tiene prioridad
+        self.routes.sort(key=lambda route: len(route[0]), reverse=True)
+
+    def match(self, path):
+        for route in self.routes:
+            prefix = route[0]
+            if path == prefix or path.startswith(prefix.rstrip('/') + '/'):
+                return route
+        return None
+
+    def choose(self, route):
+        _, pools, counter = route
+        if self.balance == 'least_connections':
+            return min(pools, key=lambda pool: pool.active)
+        return pools[next(counter) % len(pools)]
+
+    def forward(self, route, client_socket, method, path, http_version, headers, body, connection_headers,
+                body_reader=None):
+        """Sends the request upstream and streams the response back to the client.
+
+        connection_headers(keep_alive) returns the Connection/Keep-Alive header lines for the
+        client. A chunked request body is streamed from body_reader instead of body. Returns
+        False when the client connection has to be closed afterwards.
+        """
+        pool = self.choose(route)
+        request = self.build_upstream_request(method, path, headers, body, client_socket, chunked=body_reader is not None)
+        upstream, reader, status_line = self.exchange(pool, request, body_reader)
+
+        reusable = False
+        try:
+            response_headers = self.read_headers(reader)
+            status_code = int(status_line.split()[1])
+            # Las respuestas 1xx son provisionales: se descartan y se espera la respuesta final
+            while 100 <= status_code < 200:
+                status_line = reader.readline(max_line_length)
+                if not status_line:
+                    raise ConnectionError("upstream closed the connection")
+                response_headers = self.read_headers(reader)
+                status_code = int(status_line.split()[1])
+            framing = self.response_framing(method, status_code, response_headers)
+            upstream_keep_alive = 'close' not in response_headers.get('connection', '').lower()
+            client_keep_alive = framing != 'eof'
+
+            status = status_line.decode('latin-1').rstrip(crlf).split(' ', 1)[1]
+            head = [f"{http_version} {status}"]
+            for key, value in response_headers.raw:
+                if key.lower() not in hop_by_hop_headers:
+                    head.append(f"{key}: {value}")
+            if framing == 'chunked':
+                head.append("Transfer-Encoding: chunked")
+            head.extend(connection_headers(client_keep_alive))
+            client_socket.sendall((crlf.join(head) + crlf + crlf).encode('latin-1'))
+
+            if framing == 'length':
+                self.relay_length(reader, client_socket, int(response_headers['content-length']))
+            elif framing == 'chunked':
+                self.relay_chunked(reader, client_socket)
+            elif framing == 'eof':
+                self.relay_until_eof(reader, client_socket)
+            reusable = framing != 'eof' and upstream_keep_alive
+            return client_keep_alive
+        finally:
+            pool.release(upstream, reader, reusable)
+
+    def exchange(self, pool, request, body_reader=None):
+        """Sends the request and reads the status line, retrying when a pooled connection went stale."""
+        while True:
+            try:
+                # Un cuerpo ya consumido del cliente no se puede reenviar: nada de conexiones quizas caducadas
+                upstream, reader, reused = pool.acquire(fresh=body_reader is not None)
+            except OSError as e:
+                raise ProxyError(f"Upstream {pool} unavailable: {e}")
+            try:
+                upstream.sendall(request)
+                if body_reader is not None:
+                    # El cuerpo chunked se reenvia tal cual, trozo a trozo, a medida que llega del cliente
+                    self.relay_chunked(body_reader, upstream)
+                status_line = reader.readline(max_line_length)
+                if status_line:
+                    return upstream, reader, status_line
+                error = ConnectionError("upstream closed the connection")
+            except OSError as e:
+                error = e
+            pool.release(upstream, reader, False)
+            # Una conexion reutilizada pudo ser cerrada por el upstream: se prueba con otra
+            if not reused:
+                raise ProxyError(f"Upstream {pool} unavailable: {error}")
+
+    def build_upstream_request(self, method, path, headers, body, client_socket, chunked=False):
+        lines = [f"{method} {path} HTTP/1.1"]
+        forwarded_for = None
+        for key, value in headers.items():
+            if key.lower() == 'x-forwarded-for':
+                # Se reenvia una sola vez, abajo, con la IP del cliente al final
+                forwarded_for = value
+                continue
+            # El cuerpo ya esta completo, asi que Expect: 100-continue no tiene sentido hacia el upstream
+            if key.lower() not in hop_by_hop_headers and key.lower() not in ('content-length', 'expect'):
+                lines.append(f"{key}: {value}")
+        try:
+            client_ip = client_socket.getpeername()[0]
+            forwarded_for = f"{forwarded_for}, {client_ip}" if forwarded_for else client_ip
+        except OSError:
+            pass
+        if forwarded_for:
+            lines.append(f"X-Forwarded-For: {forwarded_for}")
+        lines.append(f"X-Forwarded-Proto: {'https' if isinstance(client_socket, ssl.SSLSocket) else 'http'}")
+        if chunked:
+            lines.append("Transfer-Encoding: chunked")
+        elif body or method in ('POST', 'PUT'):
+            lines.append(f"Content-Length: {len(body)}")
+        lines.append("Connection: keep-alive")
+        return (crlf.join(lines) + crlf + crlf).encode('latin-1') + body
+
+    def read_headers(self, reader):
+        headers = ResponseHeaders()
+        while True:
+            line = reader.readline(max_line_length)
+            if not line:
+                raise ConnectionError("upstream closed the connection")
+            line = line.decode('latin-1').rstrip(crlf)
+            if not line:
+                return headers
+            if ':' in line:
+                key, value = line.split(':', 1)
+                headers.add(key.strip(), value.strip())
+
+    def response_framing(self, method, status_code, headers):
+        if method == 'HEAD' or status_code in (204, 304) or 100 <= status_code < 200:
+            return 'none'
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            return 'chunked'
+        if 'content-length' in headers:
+            return 'length'
+        return 'eof'
+
+    def relay_length(self, reader, destination, remaining):
+        while remaining > 0:
+            chunk = reader.read1(min(remaining, relay_chunk_size))
+            if not chunk:
+                raise ConnectionError("connection closed mid-body")
+            destination.sendall(chunk)
+            remaining -= len(chunk)
+
+    def relay_chunked(self, reader, destination):
+        # Se reenvia el cuerpo con su codificacion original, trozo a trozo (respuestas y peticiones)
+        while True:
+            size_line = reader.readline(max_line_length)
+            if not size_line:
+                raise ConnectionError("connection closed mid-body")
+            destination.sendall(size_line)
+            size = int(size_line.split(b';', 1)[0].strip(), 16)
+            if size == 0:
+                break
+            self.relay_length(reader, destination, size + 2)
+        while True:
+            trailer = reader.readline(max_line_length)
+            destination.sendall(trailer)
+            if not trailer or trailer == b'\r\n':
+                return
+
+    def relay_until_eof(self, reader, client_socket):
+        while True:
+            chunk = reader.read1(relay_chunk_size)
+            if not chunk:
+                return
+            client_socket.sendall(chunk)
+
+    def allows_tunnel(self, target):
+        try:
+            return tunnel_target(target) in self.tunnel_allow
+        except ValueError:
+            return False
+
+    def open_tunnel(self, target):
+        """Connects to the CONNECT target given as host:port (a leading '/' is ignored)."""
+        try:
+            host, port = parse_address(target.lstrip('/'))
+            return socket.create_connection((host, port), timeout=self.timeout)
+        except (ValueError, OSError) as e:
+            raise ProxyError(f"Cannot reach {target}: {e}")
+
+    def tunnel(self, client_socket, upstream):
+        """Relays bytes in both directions until either side closes or stays idle too long."""
+        try:
+            if hasattr(os, 'splice') and not isinstance(client_socket, ssl.SSLSocket):
+                activity = TunnelActivity()
+                other_direction = Thread(target=splice_relay, args=(upstream, client_socket, self.tunnel_idle_timeout, activity))
+                other_direction.start()
+                splice_relay(client_socket, upstream, self.tunnel_idle_timeout, activity)
+                other_direction.join()
+            else:
+                copy_relay(client_socket, upstream, self.tunnel_idle_timeout)
+        finally:
+            upstream.close()
+
+
+class ResponseHeaders(dict):
+    """Case-insensitive header lookup that remembers the original names and order."""
+
+    def __init__(self):
+        super().__init__()
+        self.raw = []
+
+    def add(self, key, value):
+        self.raw.append((key, value))
+        self[key.lower()] = value
+
+
+class TunnelActivity:
+    """Last time either direction of a tunnel moved data, shared by both relay threads."""
+
+    def __init__(self):
+        self.last = time.monotonic()
+
+    def touch(self):
+        self.last = time.monotonic()
+
+    def idle_for(self):
+        return time.monotonic() - self.last
+
+
+def parse_address(address):
+    host, _, port = address.rpartition(':')
+    if not host:
+        raise ValueError(f"Expected host:port, got {address!r}")
+    return host, int(port)
+
+
+def tunnel_target(target):
+    """Normalizes a CONNECT target given as host:port (a leading '/' is ignored)."""
+    host, port = parse_address(target.lstrip('/'))
+    return host.lower(), port
+
+
+def shutdown_write(destination):
+    # Se propaga el fin de datos al otro extremo para que el otro sentido tambien termine
+    try:
+        socket.socket.shutdown(destination, socket.SHUT_WR)
+    except OSError:
+        pass
+
+
+def splice_relay(source, destination, idle_timeout, activity):
+    """Copies source into destination with splice(2), so the bytes never pass through Python.
+
+    Stops when the tunnel has been idle in both directions for idle_timeout.
+    """
+    source.setblocking(True)
+    read_fd, write_fd = os.pipe()
+    try:
+        while True:
+            ready, _, _ = select.select([source], [], [], max(idle_timeout - activity.idle_for(), 0))
+            if not ready:
+                # Un sentido callado no cierra el tunel mientras el otro siga activo (p. ej. una descarga larga)
+                if activity.idle_for() >= idle_timeout:
+                    return
+                continue
+            pending = os.splice(source.fileno(), write_fd, relay_chunk_size)
+            if pending == 0:
+                return
+            activity.touch()
+            while pending:
+                pending -= os.splice(read_fd, destination.fileno(), pending)
+    except OSError:
+        pass
+    finally:
+        os.close(read_fd)
+        os.close(write_fd)
+        shutdown_write(destination)
+
+
+def copy_relay(first, second, idle_timeout):
+    """Relays both directions from one thread; used for TLS sockets, which cannot be shared across threads."""
+    peers = {first: second, second: first}
+    open_sources = [first, second]
+    buffer = memoryview(bytearray(relay_chunk_size))
+    for peer in peers:
+        peer.settimeout(idle_timeout)
+    try:
+        while open_sources:
+            # Un socket TLS puede tener datos ya descifrados que select no ve
+            ready = [source for source in open_sources if isinstance(source, ssl.SSLSocket) and source.pending()]
+            if not ready:
+                ready, _, _ = select.select(open_sources, [], [], idle_timeout)
+                if not ready:
+                    return
+            for source in ready:
+                received = source.recv_into(buffer)
+                if not received:
+                    open_sources.remove(source)
+                    shutdown_write(peers[source])
+                    continue
+                peers[source].sendall(buffer[:received])
+    except OSError:
+        pass
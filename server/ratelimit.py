@@ -0,0 +1,80 @@
+import time
+from threading import Lock
+
+
+class TokenBucket:
+    """Refills rate tokens per second up to burst; __slots__ keeps each client to a few dozen bytes."""
+
+    __slots__ = ('tokens', 'updated', 'allowed', 'throttled')
+
+    def __init__(self, tokens, updated):
+        self.tokens = tokens
+        self.updated = updated
+        self.allowed = 0
+        self.throttled = 0
+
+
+class RateLimiter:
+    """Per-key token buckets (client IP, bearer token, ...) with periodic sweeping of idle keys."""
+
+    def __init__(self, rate, burst=None, sweep_interval=60):
+        # Con menos de una ficha de capacidad ninguna peticion pasaria nunca
+        if burst is not None and burst < 1:
+            raise ValueError(f"burst must be at least 1, got {burst}")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, rate)
+        self.sweep_interval = sweep_interval
+        self.buckets = {}
+        self.total_allowed = 0
+        self.total_throttled = 0
+        self.last_sweep = time.monotonic()
+        self.lock = Lock()
+
+    def acquire(self, key, consume=True):
+        """Takes a token for key; returns 0 when allowed, otherwise the seconds until one is available.
+
+        With consume=False it only checks that a token is available (used at accept time).
+        """
+        now = time.monotonic()
+        with self.lock:
+            if now - self.last_sweep >= self.sweep_interval:
+                self.sweep(now)
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = TokenBucket(self.burst, now)
+            else:
+                bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+                bucket.updated = now
+            if bucket.tokens >= 1:
+                if consume:
+                    bucket.tokens -= 1
+                    bucket.allowed += 1
+                    self.total_allowed += 1
+                return 0
+            bucket.throttled += 1
+            self.total_throttled += 1
+            return (1 - bucket.tokens) / self.rate
+
+    def sweep(self, now):
+        # Un bucket que ya se habria rellenado por completo equivale a uno nuevo: se descarta
+        refill_time = self.burst / self.rate
+        stale = [key for key, bucket in self.buckets.items() if now - bucket.updated >= refill_time]
+        for key in stale:
+            del self.buckets[key]
+        self.last_sweep = now
+
+    def stats(self):
+        """Returns the totals and the currently tracked keys that have been throttled."""
+        with self.lock:
+            throttled = {
+                key: {'allowed': bucket.allowed, 'throttled': bucket.throttled}
+                for key, bucket in self.buckets.items() if bucket.throttled
+            }
+            return {
+                'rate': self.rate,
+                'burst': self.burst,
+                'tracked_keys': len(self.buckets),
+                'allowed': self.total_allowed,
+                'throttled': self.total_throttled,
+                'throttled_keys': throttled,
+            }
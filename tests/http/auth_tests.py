@@ -0,0 +1,134 @@
+import os, sys, tempfile
+
+# El middleware de autenticacion vive junto al servidor
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'server'))
+import auth
+from auth import TokenAuth, TokenCache, hash_token, index_prefix_length
+
+# Almacena los resultados de las pruebas
+results = []
+
+def print_case(case, description):
+    print(f"\n👉 \033[1mCase: {case}\033[0m")
+    print(f"   📝 {description}")
+
+def evaluate(case, expected, actual):
+    success = expected == actual
+    results.append({
+        "case": case,
+        "status": "Success" if success else "Failed",
+        "expected": expected,
+        "actual": actual
+    })
+    if success:
+        print(f"   ✅ \033[92mSuccess\033[0m")
+    else:
+        print(f"   ❌ \033[91mFailed\033[0m")
+
+class FakeClock:
+    """Replaces time.monotonic in auth so cache expiry does not depend on real waits."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+clock = FakeClock()
+auth.time = clock
+
+# Cache LRU con caducidad
+print_case("LRU eviction", "With max_size=2, reading 'a' makes 'b' the least recently used entry")
+cache = TokenCache(max_size=2, ttl=300)
+cache.add(b"a")
+cache.add(b"b")
+touched = b"a" in cache
+cache.add(b"c")
+evaluate("LRU eviction", (True, True, False, True, 2),
+         (touched, b"a" in cache, b"b" in cache, b"c" in cache, len(cache)))
+
+print_case("TTL expiry", "An entry is valid until its ttl elapses and is removed once expired")
+cache = TokenCache(max_size=10, ttl=5)
+cache.add(b"d")
+clock.now += 4.9
+fresh = b"d" in cache
+clock.now += 0.2
+evaluate("TTL expiry", (True, False, 0), (fresh, b"d" in cache, len(cache)))
+
+print_case("Re-adding refreshes", "Adding a cached digest again extends its expiry")
+cache = TokenCache(max_size=10, ttl=5)
+cache.add(b"e")
+clock.now += 4
+cache.add(b"e")
+clock.now += 4
+evaluate("Re-adding refreshes", (True, 1), (b"e" in cache, len(cache)))
+
+# Indice de tokens estaticos
+print_case("Index hits", "Every configured token verifies and is stored only as a SHA-256 digest")
+token_auth = TokenAuth(tokens=["12345", "other-token"])
+stored = [digest for digests in token_auth.index.values() for digest in digests]
+evaluate("Index hits", (True, True, sorted([hash_token("12345"), hash_token("other-token")])),
+         (token_auth.verify("12345"), token_auth.verify("other-token"), sorted(stored)))
+
+print_case("Index layout", "Digests are grouped by their first bytes")
+evaluate("Index layout", {hash_token("12345")[:index_prefix_length], hash_token("other-token")[:index_prefix_length]},
+         set(token_auth.index))
+
+print_case("Index misses", "Unknown, empty and near-miss tokens are rejected without a verifier")
+evaluate("Index misses", [False, False, False],
+         [token_auth.verify("nope"), token_auth.verify(""), token_auth.verify("123456")])
+
+print_case("Tokens file", "load_tokens skips blank lines and '#' comments")
+with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as tokens_file:
+    tokens_file.write("# comentario\n\nfrom-file\n  padded  \n")
+try:
+    token_auth = TokenAuth()
+    token_auth.load_tokens(tokens_file.name)
+finally:
+    os.unlink(tokens_file.name)
+evaluate("Tokens file", [True, True, False],
+         [token_auth.verify("from-file"), token_auth.verify("padded"), token_auth.verify("# comentario")])
+
+# Verificador externo con cache
+print_case("Verifier and cache", "Accepted tokens are cached; rejected ones are asked again")
+calls = []
+def verifier(auth_token):
+    calls.append(auth_token)
+    return auth_token.startswith("v-")
+token_auth = TokenAuth(verifier=verifier, cache=TokenCache(ttl=60))
+outcomes = [token_auth.verify("v-1"), token_auth.verify("v-1"), token_auth.verify("bad"), token_auth.verify("bad")]
+evaluate("Verifier and cache", ([True, True, False, False], ["v-1", "bad", "bad"]), (outcomes, calls))
+
+print_case("Cache expiry re-verifies", "Once the cached entry expires the verifier is consulted again")
+clock.now += 61
+evaluate("Cache expiry re-verifies", (True, ["v-1", "bad", "bad", "v-1"]), (token_auth.verify("v-1"), calls))
+
+# Middleware
+print_case("Authenticate", "Missing header, invalid token and valid token on a protected prefix")
+token_auth = TokenAuth(tokens=["12345"])
+evaluate("Authenticate",
+         ["Authorization header missing.", "Invalid or missing authorization token.", None],
+         [token_auth.authenticate({}), token_auth.authenticate({"Authorization": "Bearer nope"}),
+          token_auth.authenticate({"Authorization": "Bearer 12345"})])
+
+print_case("Protected prefix", "Only paths under the protected prefix need a token")
+evaluate("Protected prefix", [True, True, False],
+         [token_auth.protects("/secure"), token_auth.protects("/secure/rate-limits"), token_auth.protects("/public")])
+
+# Resumen
+print("\n🎉 \033[1mTest Summary\033[0m 🎉")
+total_cases = len(results)
+success_cases = sum(1 for result in results if result["status"] == "Success")
+failed_cases = total_cases - success_cases
+
+print(f"   ✅ Successful cases: {success_cases}/{total_cases}")
+
+if failed_cases > 0:
+    print(f"   ❌ Failed cases: {failed_cases}/{total_cases}")
+    print("\n📋 \033[1mFailed Cases Details:\033[0m")
+    for result in results:
+        if result["status"] == "Failed":
+            print(f"   ❌ {result['case']}")
+            print(f"      - Expected: {result['expected']}")
+            print(f"      - Actual: {result['actual']}\n")
+    sys.exit(1)
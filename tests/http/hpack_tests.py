@@ -0,0 +1,166 @@
+import os, sys
+
+# El codec HPACK vive junto al servidor
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'server'))
+from http2 import (Decoder, Encoder, HpackError, decode_integer, encode_integer, huffman_decode)
+
+# Almacena los resultados de las pruebas
+results = []
+
+def print_case(case, description):
+    print(f"\n👉 \033[1mCase: {case}\033[0m")
+    print(f"   📝 {description}")
+
+def evaluate(case, expected, actual):
+    success = expected == actual
+    results.append({
+        "case": case,
+        "status": "Success" if success else "Failed",
+        "expected": expected,
+        "actual": actual
+    })
+    if success:
+        print(f"   ✅ \033[92mSuccess\033[0m")
+    else:
+        print(f"   ❌ \033[91mFailed\033[0m")
+
+def decode_or_error(decoder, block):
+    try:
+        return decoder.decode(block)
+    except HpackError as e:
+        return f"HpackError: {e}"
+
+def huffman_or_error(data):
+    try:
+        return huffman_decode(data)
+    except HpackError:
+        return "HpackError"
+
+def table_state(decoder):
+    return list(decoder.dynamic_table), decoder.table_size
+
+# Enteros con prefijo (RFC 7541, C.1)
+print_case("Integer encoding", "RFC 7541 C.1: 10 and 1337 with a 5-bit prefix, 42 with an 8-bit prefix")
+evaluate("Integer encoding",
+         [bytes.fromhex("0a"), bytes.fromhex("1f9a0a"), bytes.fromhex("2a")],
+         [encode_integer(10, 5), encode_integer(1337, 5), encode_integer(42, 8)])
+
+print_case("Integer round trip", "Values around the prefix limits decode to themselves")
+values = [0, 1, 30, 31, 32, 126, 127, 128, 255, 16383, 16384, 2 ** 21, 2 ** 28 - 1]
+evaluate("Integer round trip",
+         [(value, len(encode_integer(value, bits))) for bits in (4, 5, 6, 7) for value in values],
+         [decode_integer(encode_integer(value, bits), 0, bits) for bits in (4, 5, 6, 7) for value in values])
+
+# Representaciones de campos (RFC 7541, C.2)
+print_case("Literal with indexing", "RFC 7541 C.2.1: the field is added to the dynamic table")
+decoder = Decoder()
+headers = decoder.decode(bytes.fromhex("400a637573746f6d2d6b65790d637573746f6d2d686561646572"))
+evaluate("Literal with indexing",
+         ([("custom-key", "custom-header")], [("custom-key", "custom-header")], 55),
+         (headers, *table_state(decoder)))
+
+print_case("Literal without indexing", "RFC 7541 C.2.2: the dynamic table stays empty")
+decoder = Decoder()
+headers = decoder.decode(bytes.fromhex("040c2f73616d706c652f70617468"))
+evaluate("Literal without indexing", ([(":path", "/sample/path")], [], 0), (headers, *table_state(decoder)))
+
+print_case("Literal never indexed", "RFC 7541 C.2.3: the dynamic table stays empty")
+decoder = Decoder()
+headers = decoder.decode(bytes.fromhex("100870617373776f726406736563726574"))
+evaluate("Literal never indexed", ([("password", "secret")], [], 0), (headers, *table_state(decoder)))
+
+print_case("Indexed field", "RFC 7541 C.2.4: static table entry 2")
+evaluate("Indexed field", [(":method", "GET")], Decoder().decode(bytes.fromhex("82")))
+
+# Secuencias de peticiones que comparten la tabla dinamica (RFC 7541, C.3 y C.4)
+request_headers = [
+    [(":method", "GET"), (":scheme", "http"), (":path", "/"), (":authority", "www.example.com")],
+    [(":method", "GET"), (":scheme", "http"), (":path", "/"), (":authority", "www.example.com"),
+     ("cache-control", "no-cache")],
+    [(":method", "GET"), (":scheme", "https"), (":path", "/index.html"), (":authority", "www.example.com"),
+     ("custom-key", "custom-value")],
+]
+request_table_sizes = [57, 110, 164]
+
+for section, blocks in (
+    ("C.3", ["828684410f7777772e6578616d706c652e636f6d",
+             "828684be58086e6f2d6361636865",
+             "828785bf400a637573746f6d2d6b65790c637573746f6d2d76616c7565"]),
+    ("C.4", ["828684418cf1e3c2e5f23a6ba0ab90f4ff",
+             "828684be5886a8eb10649cbf",
+             "828785bf408825a849e95ba97d7f8925a849e95bb8e8b4bf"]),
+):
+    case = f"Request sequence {section}"
+    print_case(case, f"RFC 7541 {section}: three requests on one connection{' with Huffman strings' if section == 'C.4' else ''}")
+    decoder = Decoder()
+    actual = [(decode_or_error(decoder, bytes.fromhex(block)), decoder.table_size) for block in blocks]
+    evaluate(case, list(zip(request_headers, request_table_sizes)), actual)
+
+# Respuestas con Huffman y desalojo de la tabla dinamica de 256 bytes (RFC 7541, C.6)
+print_case("Response sequence C.6", "RFC 7541 C.6: Huffman-coded responses that evict dynamic table entries")
+response_blocks = [
+    "488264025885aec3771a4b6196d07abe941054d444a8200595040b8166e082a62d1bff"
+    "6e919d29ad171863c78f0b97c8e9ae82ae43d3",
+    "4883640effc1c0bf",
+    "88c16196d07abe941054d444a8200595040b8166e084a62d1bffc05a839bd9ab77ad94e7821dd7f2e6c7b335dfdfcd5b39"
+    "60d5af27087f3672c1ab270fb5291f9587316065c003ed4ee5b1063d5007",
+]
+response_headers = [
+    [(":status", "302"), ("cache-control", "private"), ("date", "Mon, 21 Oct 2013 20:13:21 GMT"),
+     ("location", "https://www.example.com")],
+    [(":status", "307"), ("cache-control", "private"), ("date", "Mon, 21 Oct 2013 20:13:21 GMT"),
+     ("location", "https://www.example.com")],
+    [(":status", "200"), ("cache-control", "private"), ("date", "Mon, 21 Oct 2013 20:13:22 GMT"),
+     ("location", "https://www.example.com"), ("content-encoding", "gzip"),
+     ("set-cookie", "foo=ASDJKHQKBZXOQWEOPIUAXQWEOIU; max-age=3600; version=1")],
+]
+decoder = Decoder(max_table_size=256)
+actual = [(decode_or_error(decoder, bytes.fromhex(block)), decoder.table_size) for block in response_blocks]
+evaluate("Response sequence C.6", list(zip(response_headers, [222, 222, 215])), actual)
+
+print_case("Dynamic table after C.6", "Only the three newest entries survive eviction, newest first")
+evaluate("Dynamic table after C.6",
+         [("set-cookie", "foo=ASDJKHQKBZXOQWEOPIUAXQWEOIU; max-age=3600; version=1"),
+          ("content-encoding", "gzip"), ("date", "Mon, 21 Oct 2013 20:13:22 GMT")],
+         list(decoder.dynamic_table))
+
+# Huffman invalido (RFC 7541, seccion 5.2)
+print_case("Huffman padding", "Padding must be fewer than 8 one bits, and EOS must not be decoded")
+evaluate("Huffman padding",
+         [b"a", "HpackError", "HpackError", "HpackError"],
+         [huffman_or_error(b"\x1f"), huffman_or_error(b"\x1f\xff"), huffman_or_error(b"\x18"),
+          huffman_or_error(b"\xff\xff\xff\xff")])
+
+# Ida y vuelta con el codificador del servidor
+print_case("Encoder round trip", "Static matches, indexed names, new names, credentials and UTF-8 values")
+round_trip_headers = [
+    (":status", "200"), (":status", "418"), ("content-type", "text/plain"), ("content-length", "27"),
+    ("x-custom-header", "value"), ("authorization", "Bearer 12345"), ("set-cookie", "a=1"),
+    ("x-empty", ""), ("x-unicode", "ñandú ✓"), ("x-long", "v" * 300),
+]
+block = Encoder().encode(round_trip_headers)
+decoder = Decoder()
+evaluate("Encoder round trip", (round_trip_headers, 0), (decode_or_error(decoder, block), decoder.table_size))
+
+print_case("Sensitive headers never indexed", "Credentials are encoded as never-indexed literals (0001xxxx)")
+evaluate("Sensitive headers never indexed",
+         [0x10, 0x10],
+         [Encoder().encode([(name, "x")])[0] & 0xf0 for name in ("authorization", "cookie")])
+
+# Resumen
+print("\n🎉 \033[1mTest Summary\033[0m 🎉")
+total_cases = len(results)
+success_cases = sum(1 for result in results if result["status"] == "Success")
+failed_cases = total_cases - success_cases
+
+print(f"   ✅ Successful cases: {success_cases}/{total_cases}")
+
+if failed_cases > 0:
+    print(f"   ❌ Failed cases: {failed_cases}/{total_cases}")
+    print("\n📋 \033[1mFailed Cases Details:\033[0m")
+    for result in results:
+        if result["status"] == "Failed":
+            print(f"   ❌ {result['case']}")
+            print(f"      - Expected: {result['expected']}")
+            print(f"      - Actual: {result['actual']}\n")
+    sys.exit(1)
@@ -0,0 +1,119 @@
+import os, sys
+
+# El limitador vive junto al servidor
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'server'))
+import ratelimit
+from ratelimit import RateLimiter
+
+# Almacena los resultados de las pruebas
+results = []
+
+def print_case(case, description):
+    print(f"\n👉 \033[1mCase: {case}\033[0m")
+    print(f"   📝 {description}")
+
+def evaluate(case, expected, actual):
+    success = expected == actual
+    results.append({
+        "case": case,
+        "status": "Success" if success else "Failed",
+        "expected": expected,
+        "actual": actual
+    })
+    if success:
+        print(f"   ✅ \033[92mSuccess\033[0m")
+    else:
+        print(f"   ❌ \033[91mFailed\033[0m")
+
+class FakeClock:
+    """Replaces time.monotonic in ratelimit so refills do not depend on real waits."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+clock = FakeClock()
+ratelimit.time = clock
+
+# Capacidad inicial y Retry-After
+print_case("Burst then throttle", "rate=2, burst=3: three requests pass, the fourth waits 0.5s for a token")
+limiter = RateLimiter(rate=2, burst=3)
+evaluate("Burst then throttle", [0, 0, 0, 0.5], [limiter.acquire("a") for _ in range(4)])
+
+print_case("Refill", "After 0.25s half a token is back (wait 0.25s); after 0.5s a full token passes")
+clock.now += 0.25
+waiting = limiter.acquire("a")
+clock.now += 0.25
+evaluate("Refill", (0.25, 0), (waiting, limiter.acquire("a")))
+
+print_case("Refill capped at burst", "A long pause refills only up to burst")
+clock.now += 100
+evaluate("Refill capped at burst", [0, 0, 0, 0.5], [limiter.acquire("a") for _ in range(4)])
+
+print_case("Independent keys", "Throttling one key leaves another untouched")
+evaluate("Independent keys", 0, limiter.acquire("b"))
+
+print_case("Check without consuming", "consume=False reports availability but leaves the token in the bucket")
+limiter = RateLimiter(rate=1, burst=1)
+evaluate("Check without consuming", [0, 0, 0, 1.0],
+         [limiter.acquire("a", consume=False), limiter.acquire("a", consume=False),
+          limiter.acquire("a"), limiter.acquire("a")])
+
+# Capacidad minima
+print_case("Default burst", "burst defaults to the rate but never below one token")
+evaluate("Default burst", (1, 5), (RateLimiter(0.5).burst, RateLimiter(5).burst))
+
+print_case("Fractional rate", "rate=0.5 lets the first request through and asks the next to wait 2s")
+limiter = RateLimiter(0.5)
+evaluate("Fractional rate", [0, 2.0], [limiter.acquire("a"), limiter.acquire("a")])
+
+print_case("Burst below one", "An explicit burst below 1 is rejected")
+rejected = []
+for burst in (0, 0.5, -1):
+    try:
+        RateLimiter(1, burst)
+        rejected.append(False)
+    except ValueError:
+        rejected.append(True)
+evaluate("Burst below one", [True, True, True], rejected)
+
+# Barrido de claves inactivas
+print_case("Sweep", "Keys whose bucket would be full again are dropped at the next sweep")
+limiter = RateLimiter(rate=1, burst=2, sweep_interval=10)
+limiter.acquire("old")
+clock.now += 9
+limiter.acquire("recent")
+clock.now += 1
+limiter.acquire("new")
+evaluate("Sweep", ["new", "recent"], sorted(limiter.buckets))
+
+# Estadisticas
+print_case("Stats", "Totals count every decision; only throttled keys are listed")
+limiter = RateLimiter(rate=1, burst=1)
+limiter.acquire("a")
+limiter.acquire("a")
+limiter.acquire("b")
+stats = limiter.stats()
+evaluate("Stats",
+         (2, 1, 2, {"a": {"allowed": 1, "throttled": 1}}),
+         (stats["allowed"], stats["throttled"], stats["tracked_keys"], stats["throttled_keys"]))
+
+# Resumen
+print("\n🎉 \033[1mTest Summary\033[0m 🎉")
+total_cases = len(results)
+success_cases = sum(1 for result in results if result["status"] == "Success")
+failed_cases = total_cases - success_cases
+
+print(f"   ✅ Successful cases: {success_cases}/{total_cases}")
+
+if failed_cases > 0:
+    print(f"   ❌ Failed cases: {failed_cases}/{total_cases}")
+    print("\n📋 \033[1mFailed Cases Details:\033[0m")
+    for result in results:
+        if result["status"] == "Failed":
+            print(f"   ❌ {result['case']}")
+            print(f"      - Expected: {result['expected']}")
+            print(f"      - Actual: {result['actual']}\n")
+    sys.exit(1)
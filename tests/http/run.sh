@@ -1,5 +1,32 @@
 #!/bin/bash
 
+# Pruebas del codec HPACK (no necesitan el servidor)
+echo "Ejecutando las pruebas de HPACK..."
+python3 ./tests/http/hpack_tests.py
+
+if [[ $? -ne 0 ]]; then
+  echo "HPACK test failed"
+  exit 1
+fi
+
+# Pruebas del limitador de peticiones
+echo "Ejecutando las pruebas del limitador..."
+python3 ./tests/http/ratelimit_tests.py
+
+if [[ $? -ne 0 ]]; then
+  echo "Rate limit test failed"
+  exit 1
+fi
+
+# Pruebas del middleware de autenticacion
+echo "Ejecutando las pruebas de autenticacion..."
+python3 ./tests/http/auth_tests.py
+
+if [[ $? -ne 0 ]]; then
+  echo "Auth test failed"
+  exit 1
+fi
+
 # Iniciar el servidor
 echo "Iniciando el servidor..."
 ./tests/http/server &